@@ -2,16 +2,22 @@
 Admin API endpoints for feedback analytics and management.
 """
 
+import csv
+import io
+
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from sqlalchemy import func, desc, case, and_
 from typing import List, Optional
 from datetime import datetime, timedelta
 from pydantic import BaseModel
 
 from app.db.session import get_db
 from app.core.auth import get_current_user
+from app.core.config import settings
 from app.models.database import User, Feedback, Message, ChatSession
+from app.services.cache_service import cache_service
 
 router = APIRouter()
 
@@ -55,32 +61,32 @@ async def get_feedback_stats(
             detail="Admin access required"
         )
     
+    # Stats change slowly; serve repeated dashboard loads from Redis
+    cache_key = f"feedback:stats:{days}"
+    cached = await cache_service.get(cache_key)
+    if cached:
+        return FeedbackStats.model_validate_json(cached)
+
     # Date range
     start_date = datetime.utcnow() - timedelta(days=days)
-    
-    # Basic stats
-    total_feedback = db.query(Feedback).filter(Feedback.created_at >= start_date).count()
-    positive_feedback = db.query(Feedback).filter(
-        Feedback.created_at >= start_date,
-        Feedback.rating == 'up'
-    ).count()
-    negative_feedback = db.query(Feedback).filter(
-        Feedback.created_at >= start_date,
-        Feedback.rating == 'down'
-    ).count()
-    text_feedback_count = db.query(Feedback).filter(
-        Feedback.created_at >= start_date,
-        Feedback.text_feedback.isnot(None),
-        Feedback.text_feedback != ''
-    ).count()
-    
+
+    # Basic stats - single round-trip with conditional aggregation
+    total_feedback, positive_feedback, negative_feedback, text_feedback_count = db.query(
+        func.count(Feedback.id),
+        func.coalesce(func.sum(case((Feedback.rating == 'up', 1), else_=0)), 0),
+        func.coalesce(func.sum(case((Feedback.rating == 'down', 1), else_=0)), 0),
+        func.coalesce(func.sum(case(
+            (and_(Feedback.text_feedback.isnot(None), Feedback.text_feedback != ''), 1),
+            else_=0
+        )), 0)
+    ).filter(Feedback.created_at >= start_date).one()
+
     # Average rating (1 for up, 0 for down)
     avg_rating = None
     if positive_feedback + negative_feedback > 0:
         avg_rating = positive_feedback / (positive_feedback + negative_feedback)
     
     # Feedback by day
-    from sqlalchemy import case
     feedback_by_day = db.query(
         func.date(Feedback.created_at).label('date'),
         func.count(Feedback.id).label('count'),
@@ -104,7 +110,7 @@ async def get_feedback_stats(
         for row in feedback_by_day
     ]
     
-    return FeedbackStats(
+    stats = FeedbackStats(
         total_feedback=total_feedback,
         positive_feedback=positive_feedback,
         negative_feedback=negative_feedback,
@@ -113,6 +119,10 @@ async def get_feedback_stats(
         feedback_by_day=feedback_by_day_list
     )
 
+    await cache_service.set(cache_key, stats.model_dump_json(), settings.cache_ttl_seconds)
+
+    return stats
+
 
 @router.get("/admin/feedback/details", response_model=List[FeedbackDetail])
 async def get_feedback_details(
@@ -131,8 +141,22 @@ async def get_feedback_details(
             detail="Admin access required"
         )
     
-    query = db.query(Feedback).join(User, Feedback.user_id == User.id)
-    
+    # Select only the needed columns and truncate the response in SQL (one
+    # extra char so we know whether to append the ellipsis) - long LLM
+    # responses never cross the wire in full
+    query = db.query(
+        Feedback.id,
+        Feedback.session_id,
+        Feedback.message_id,
+        User.email.label('user_email'),
+        Feedback.question,
+        func.substr(Feedback.response, 1, 501).label('response_preview'),
+        Feedback.rating,
+        Feedback.text_feedback,
+        Feedback.model_used,
+        Feedback.created_at
+    ).join(User, Feedback.user_id == User.id)
+
     # Apply filters
     if rating:
         query = query.filter(Feedback.rating == rating)
@@ -148,26 +172,26 @@ async def get_feedback_details(
                 (Feedback.text_feedback.is_(None)) | (Feedback.text_feedback == '')
             )
     
-    # Get results with user email
+    # Get results with user email (single round-trip, no per-row lookup)
     results = query.order_by(desc(Feedback.created_at)).offset(offset).limit(limit).all()
-    
+
     # Format response
     feedback_details = []
-    for feedback in results:
-        user = db.query(User).filter(User.id == feedback.user_id).first()
+    for row in results:
+        preview = row.response_preview or ""
         feedback_details.append(FeedbackDetail(
-            id=feedback.id,
-            session_id=feedback.session_id,
-            message_id=feedback.message_id,
-            user_email=user.email if user else "Unknown",
-            question=feedback.question,
-            response=feedback.response[:500] + "..." if len(feedback.response) > 500 else feedback.response,
-            rating=feedback.rating,
-            text_feedback=feedback.text_feedback,
-            model_used=feedback.model_used,
-            created_at=feedback.created_at.isoformat()
+            id=row.id,
+            session_id=row.session_id,
+            message_id=row.message_id,
+            user_email=row.user_email or "Unknown",
+            question=row.question,
+            response=preview[:500] + "..." if len(preview) > 500 else preview,
+            rating=row.rating,
+            text_feedback=row.text_feedback,
+            model_used=row.model_used,
+            created_at=row.created_at.isoformat()
         ))
-    
+
     return feedback_details
 
 
@@ -185,44 +209,63 @@ async def export_feedback_csv(
             detail="Admin access required"
         )
     
-    from fastapi.responses import StreamingResponse
-    import csv
-    import io
-    
     start_date = datetime.utcnow() - timedelta(days=days)
-    
-    feedback_data = db.query(Feedback).join(User, Feedback.user_id == User.id).filter(
+
+    # Truncate previews in SQL so only ~100 chars per text column are shipped
+    query = db.query(
+        Feedback.id,
+        Feedback.created_at,
+        User.email.label('user_email'),
+        Feedback.rating,
+        Feedback.text_feedback,
+        func.substr(Feedback.question, 1, 101).label('question_preview'),
+        func.substr(Feedback.response, 1, 101).label('response_preview'),
+        Feedback.model_used
+    ).join(User, Feedback.user_id == User.id).filter(
         Feedback.created_at >= start_date
-    ).order_by(desc(Feedback.created_at)).all()
-    
-    # Create CSV
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    # Headers
-    writer.writerow([
-        'ID', 'Date', 'User Email', 'Rating', 'Has Text Feedback', 
-        'Question', 'Response Preview', 'Model Used'
-    ])
-    
-    # Data
-    for feedback in feedback_data:
-        user = db.query(User).filter(User.id == feedback.user_id).first()
+    ).order_by(desc(Feedback.created_at))
+
+    def generate_csv():
+        # Reusable buffer so memory stays bounded regardless of export
+        # size; compression is left to GZipMiddleware, which only applies
+        # when the client actually advertises gzip support
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        # Headers
         writer.writerow([
-            feedback.id,
-            feedback.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-            user.email if user else "Unknown",
-            feedback.rating or "None",
-            "Yes" if feedback.text_feedback else "No",
-            feedback.question[:100] + "..." if len(feedback.question) > 100 else feedback.question,
-            feedback.response[:100] + "..." if len(feedback.response) > 100 else feedback.response,
-            feedback.model_used or "Unknown"
+            'ID', 'Date', 'User Email', 'Rating', 'Has Text Feedback',
+            'Question', 'Response Preview', 'Model Used'
         ])
-    
-    output.seek(0)
-    
+
+        # Data - pull rows from the DB in batches instead of loading all
+        # at once, flushing output every couple hundred rows
+        for count, row in enumerate(query.yield_per(500), 1):
+            question = row.question_preview or ""
+            response = row.response_preview or ""
+            writer.writerow([
+                row.id,
+                row.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+                row.user_email or "Unknown",
+                row.rating or "None",
+                "Yes" if row.text_feedback else "No",
+                question[:100] + "..." if len(question) > 100 else question,
+                response[:100] + "..." if len(response) > 100 else response,
+                row.model_used or "Unknown"
+            ])
+            if count % 200 == 0:
+                yield buffer.getvalue().encode('utf-8')
+                buffer.seek(0)
+                buffer.truncate(0)
+
+        chunk = buffer.getvalue()
+        if chunk:
+            yield chunk.encode('utf-8')
+
     return StreamingResponse(
-        io.BytesIO(output.getvalue().encode('utf-8')),
+        generate_csv(),
         media_type="text/csv",
-        headers={"Content-Disposition": f"attachment; filename=feedback_export_{datetime.now().strftime('%Y%m%d')}.csv"}
+        headers={
+            "Content-Disposition": f"attachment; filename=feedback_export_{datetime.now().strftime('%Y%m%d')}.csv",
+        }
     )
\ No newline at end of file
@@ -6,22 +6,42 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List
+import hashlib
 import json
 import asyncio
+import logging
+import orjson
 from app.db import get_db
 from app.core.auth import get_current_user
 from app.models import User
 from app.services.chat_service import ChatService
 # Only import cloud agent service (works in both local and cloud)
 from app.services.cloud_agent_service import cloud_agent_service
+from app.services.cache_service import cache_service
 from app.models.schemas import (
-    ChatSessionResponse, 
-    CreateSessionRequest, 
+    ChatSessionResponse,
+    CreateSessionRequest,
     SendMessageRequest,
     MessageResponse
 )
 
 router = APIRouter(prefix="/chat", tags=["chat"])
+logger = logging.getLogger(__name__)
+
+# Identical clinical queries repeat heavily across users; cache full agent
+# responses for a day so hits skip the LLM + vector DB entirely
+AGENT_CACHE_TTL_SECONDS = 86400
+
+
+def _agent_cache_key(content: str, conversation_history: List[dict]) -> str:
+    """Build a cache key from the query and its conversation context."""
+    payload = json.dumps([content, conversation_history], sort_keys=True)
+    return "agent:response:" + hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+def sse(type_: str, data) -> bytes:
+    """Serialize one SSE frame with orjson, as bytes ready for the ASGI layer."""
+    return b"data: " + orjson.dumps({"type": type_, "data": data}) + b"\n\n"
 
 
 @router.post("/sessions", response_model=ChatSessionResponse)
@@ -58,9 +78,7 @@ async def get_session(
             detail="Session not found"
         )
     
-    # Load messages
-    messages = ChatService.get_session_messages(db, session_id)
-    session.messages = messages
+    # messages arrive via the selectin relationship, already ordered
     return session
 
 
@@ -82,43 +100,79 @@ async def send_message_stream(
     
     async def generate_response():
         try:
-            # Add user message
+            # Commit the user message before generation: holding a write
+            # transaction open across the (long) LLM call would block every
+            # other writer, and a mid-stream disconnect must not lose it
             user_message = ChatService.add_message(db, session_id, "user", request.content)
             
             # Send user message
-            yield f"data: {json.dumps({'type': 'user_message', 'data': {'id': user_message.id, 'content': request.content}})}\n\n"
+            yield sse('user_message', {'id': user_message.id, 'content': request.content})
             
             # Send thinking status
-            yield f"data: {json.dumps({'type': 'thinking', 'data': {'status': 'Analyzing symptoms and retrieving DSM-5-TR criteria...'}})}\n\n"
-            await asyncio.sleep(0.5)
-            
-            # Update thinking status
-            yield f"data: {json.dumps({'type': 'thinking', 'data': {'status': 'Querying vector database for relevant DSM-5-TR sections...'}})}\n\n"
-            await asyncio.sleep(0.5)
-            
-            # Get conversation history for context
-            messages = ChatService.get_session_messages(db, session_id)
+            yield sse('thinking', {'status': 'Analyzing symptoms and retrieving DSM-5-TR criteria...'})
+
+            # Get conversation history for context (last 6 messages)
+            messages = ChatService.get_recent_messages(db, session_id, limit=6)
             conversation_history = []
-            for msg in messages[-6:]:  # Last 6 messages for context
+            for msg in messages:
                 conversation_history.append({
                     'role': msg.role,
                     'content': msg.content
                 })
             
             # Get agent response with conversation history
-            yield f"data: {json.dumps({'type': 'thinking', 'data': {'status': 'Generating clinical analysis...'}})}\n\n"
-            
-            try:
-                print(f"🔍 About to call cloud_agent_service.process_query")
-                agent_response = cloud_agent_service.process_query(request.content, conversation_history)
-                print(f"🔍 cloud_agent_service returned: {type(agent_response)}")
-            except Exception as e:
-                print(f"Agent error: {e}")  # Debug log
-                import traceback
-                print(f"Full traceback: {traceback.format_exc()}")
-                # Quick fallback response for testing
-                agent_response = {
-                    'response': f"""Based on your query: "{request.content}"
+            yield sse('thinking', {'status': 'Generating clinical analysis...'})
+
+            # Forward chunks as the agent produces them - no artificial
+            # sleeps or word re-chunking of an already-complete response
+            citations = []
+            response_parts = []
+            used_fallback = False
+            cache_key = _agent_cache_key(request.content, conversation_history)
+            cached = await cache_service.get(cache_key)
+            if cached:
+                # Replay a previously generated response without touching the agent
+                agent_response = json.loads(cached)
+                citations = agent_response.get('citations', [])
+                if citations:
+                    yield sse('citations', citations)
+                yield sse('response_start', {})
+                cached_text = agent_response.get('response', '')
+                yield sse('response_chunk', {'chunk': cached_text, 'index': 0})
+                response_parts.append(cached_text)
+            else:
+                try:
+                    logger.debug("About to call cloud_agent_service.stream_query")
+                    # Pull from the sync generator in a worker thread so the
+                    # blocking LLM/vector I/O doesn't stall the event loop
+                    stream = cloud_agent_service.stream_query(request.content, conversation_history)
+                    stream_done = object()
+                    while True:
+                        item = await asyncio.to_thread(next, stream, stream_done)
+                        if item is stream_done:
+                            break
+                        kind, payload = item
+                        if kind == 'citations':
+                            citations = payload or []
+                            if citations:
+                                yield sse('citations', citations)
+                            yield sse('response_start', {})
+                        elif kind == 'text' and payload:
+                            yield sse('response_chunk', {'chunk': payload, 'index': len(response_parts)})
+                            response_parts.append(payload)
+                        elif kind == 'error':
+                            # Agent yielded an apology instead of an answer;
+                            # show it but never cache it as a real response
+                            used_fallback = True
+                            yield sse('response_chunk', {'chunk': payload, 'index': len(response_parts)})
+                            response_parts.append(payload)
+                except Exception as e:
+                    print(f"Agent error: {e}")  # Debug log
+                    import traceback
+                    print(f"Full traceback: {traceback.format_exc()}")
+                    used_fallback = True
+                    # Quick fallback response for testing
+                    fallback_text = f"""Based on your query: "{request.content}"
 
 I would need to analyze this against DSM-5-TR criteria. However, I'm currently experiencing technical difficulties accessing the full diagnostic database.
 
@@ -127,45 +181,39 @@ For immediate clinical guidance, please consider:
 2. Consulting with a supervising psychiatrist
 3. Documenting all symptoms systematically
 
-This is a clinical decision support tool and not a replacement for professional psychiatric evaluation.""",
-                    'citations': [
+This is a clinical decision support tool and not a replacement for professional psychiatric evaluation."""
+                    citations = [
                         {'content': 'DSM-5-TR diagnostic criteria (system currently unavailable)', 'source': 'DSM-5-TR'}
-                    ],
-                    'disclaimer': 'This is a clinical decision support tool and not a replacement for professional psychiatric evaluation.'
-                }
-            
-            # Send citations first
-            if agent_response.get('citations'):
-                yield f"data: {json.dumps({'type': 'citations', 'data': agent_response['citations']})}\n\n"
-                await asyncio.sleep(0.2)
-            
-            # Stream the response word by word
-            response_text = agent_response.get('response', 'No response generated.')
-            words = response_text.split()
-            
-            yield f"data: {json.dumps({'type': 'response_start', 'data': {}})}\n\n"
-            
-            # Stream in chunks of 3-5 words for faster display
-            chunk_size = 4
-            for i in range(0, len(words), chunk_size):
-                chunk = ' '.join(words[i:i + chunk_size])
-                yield f"data: {json.dumps({'type': 'response_chunk', 'data': {'chunk': chunk, 'index': i}})}\n\n"
-                await asyncio.sleep(0.1)  # Faster streaming
-            
+                    ]
+                    yield sse('citations', citations)
+                    yield sse('response_start', {})
+                    yield sse('response_chunk', {'chunk': fallback_text, 'index': len(response_parts)})
+                    response_parts.append(fallback_text)
+
+            response_text = ''.join(response_parts) or 'No response generated.'
+
+            # Cache successful responses for identical repeat queries
+            if not cached and not used_fallback and response_parts:
+                await cache_service.set(
+                    cache_key,
+                    json.dumps({'response': response_text, 'citations': citations}),
+                    AGENT_CACHE_TTL_SECONDS
+                )
+
             # Save complete assistant message
-            assistant_message = ChatService.add_message(db, session_id, "assistant", response_text, agent_response.get('citations', []))
-            
+            assistant_message = ChatService.add_message(db, session_id, "assistant", response_text, citations)
+
             # Send completion
-            yield f"data: {json.dumps({'type': 'response_complete', 'data': {'id': assistant_message.id, 'full_response': response_text, 'citations': agent_response.get('citations', [])}})}\n\n"
+            yield sse('response_complete', {'id': assistant_message.id, 'full_response': response_text, 'citations': citations})
             
         except Exception as e:
             print(f"Streaming error: {e}")  # Debug log
             error_msg = f"I apologize, but I encountered an error: {str(e)}"
             try:
                 assistant_message = ChatService.add_message(db, session_id, "assistant", error_msg)
-                yield f"data: {json.dumps({'type': 'error', 'data': {'message': error_msg, 'id': assistant_message.id}})}\n\n"
+                yield sse('error', {'message': error_msg, 'id': assistant_message.id})
             except:
-                yield f"data: {json.dumps({'type': 'error', 'data': {'message': error_msg, 'id': 0}})}\n\n"
+                yield sse('error', {'message': error_msg, 'id': 0})
     
     return StreamingResponse(
         generate_response(),
@@ -197,13 +245,14 @@ async def send_message(
         )
     
     print(f"🔵 REGULAR API: Adding user message...")
-    # Add user message
+    # Commit the user message before generation so no write transaction
+    # stays open across the (up to 30 s) agent call
     user_message = ChatService.add_message(db, session_id, "user", request.content)
     
-    # Get conversation history for context
-    messages = ChatService.get_session_messages(db, session_id)
+    # Get conversation history for context (last 6 messages)
+    messages = ChatService.get_recent_messages(db, session_id, limit=6)
     conversation_history = []
-    for msg in messages[-6:]:  # Last 6 messages for context
+    for msg in messages:
         conversation_history.append({
             'role': msg.role,
             'content': msg.content
@@ -211,13 +260,28 @@ async def send_message(
     
     # Get agent response
     print(f"🔵 REGULAR API: Starting agent processing with {len(conversation_history)} context messages...")
+    cache_key = _agent_cache_key(request.content, conversation_history)
     try:
-        print(f"🔵 REGULAR API: Using cloud agent service...")
-        agent_response = cloud_agent_service.process_query(request.content, conversation_history)
-        print(f"🔵 REGULAR API: Agent returned response of length {len(str(agent_response))}")
+        cached = await cache_service.get(cache_key)
+        if cached:
+            agent_response = json.loads(cached)
+            logger.debug("Served agent response from cache")
+        else:
+            print(f"🔵 REGULAR API: Using cloud agent service...")
+            # Run the blocking agent call in a worker thread with a timeout so
+            # the event loop keeps serving other requests
+            agent_response = await asyncio.wait_for(
+                asyncio.to_thread(cloud_agent_service.process_query, request.content, conversation_history),
+                timeout=30
+            )
+            # Failure envelopes carry an "error" key; caching one would
+            # pin the apology text to this query for the whole TTL
+            if 'error' not in agent_response:
+                await cache_service.set(cache_key, json.dumps(agent_response), AGENT_CACHE_TTL_SECONDS)
+            print(f"🔵 REGULAR API: Agent returned response of length {len(str(agent_response))}")
         
     except asyncio.TimeoutError:
-        print(f"🔴 REGULAR API: TIMEOUT after 10 seconds! Using fast fallback...")
+        print(f"🔴 REGULAR API: TIMEOUT after 30 seconds! Using fast fallback...")
         # Fast fallback if agent takes too long
         agent_response = {
             "response": f"""**Clinical Question:** {request.content}
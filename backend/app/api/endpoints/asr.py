@@ -1,16 +1,26 @@
 from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
-import tempfile
-import os
+import asyncio
+import functools
+import hashlib
+import json
+import logging
 from app.services.asr_service import ASRService
+from app.services.cache_service import cache_service
+from app.services.clinical_note_prompts import (
+    NOTE_PROMPT_PREFIX,
+    NOTE_SECTIONS_INSTRUCTION,
+    NOTE_SECTION_DEFAULTS,
+)
 from app.services.scribe_session_service import ScribeSessionService
 from app.core.auth import get_current_user
 from app.db.session import get_db
 from app.models import User
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 @router.get("/test")
 async def test_asr():
@@ -32,9 +42,43 @@ async def init_scribe_db():
     except Exception as e:
         return {"error": str(e)}
 
+@functools.lru_cache(maxsize=1)
 def get_asr_service():
+    """Shared ASRService instance; no need to rebuild config per request."""
     return ASRService()
 
+@functools.lru_cache(maxsize=1)
+def get_agent_service():
+    """Shared CloudAgentService instance (lazy import keeps startup fast)."""
+    from app.services.cloud_agent_service import CloudAgentService
+    return CloudAgentService()
+
+def _parse_note_sections(text: str) -> dict:
+    """Extract the JSON section object from an LLM response (tolerates fences)."""
+    start = text.find('{')
+    end = text.rfind('}')
+    if start == -1 or end <= start:
+        raise ValueError("No JSON object found in note response")
+    return json.loads(text[start:end + 1])
+
+def _scribe_session_payload(session) -> dict:
+    """Response shape for a scribe session. created_at is passed through
+    as a datetime; orjson renders it as ISO-8601 without per-row Python work."""
+    return {
+        "id": session.id,
+        "patient_id": session.patient_id,
+        "patient_name": session.patient_name,
+        "date": session.created_at,
+        "duration": session.duration,
+        "content": {
+            "chiefComplaint": session.chief_complaint,
+            "historyOfPresentIllness": session.history_present_illness,
+            "reviewOfSystems": session.review_systems,
+            "assessmentAndPlan": session.assessment_plan,
+            "followUpDisposition": session.followup_disposition
+        }
+    }
+
 class GenerateNoteRequest(BaseModel):
     transcript: str
     patient_name: str
@@ -68,23 +112,20 @@ async def transcribe_file(file: UploadFile = File(...)):
                 content={"success": False, "error": "AssemblyAI API key not configured"}
             )
         
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as temp_file:
-            content = await file.read()
-            temp_file.write(content)
-            temp_file_path = temp_file.name
-        
-        try:
-            result = await asr_service.transcribe_file(temp_file_path)
-            return JSONResponse(content={
-                "success": True,
-                "transcript": result['text'],
-                "confidence": result['confidence'],
-                "speakers": result['speakers']
-            })
-        finally:
-            os.unlink(temp_file_path)
-            
+        # Hand AssemblyAI the upload's own spooled file directly: no extra
+        # temp-file write/read round-trip, and Starlette's spool already caps
+        # memory (small uploads stay in RAM, large ones go to disk)
+        await file.seek(0)
+        result = await asr_service.transcribe_stream(file.file)
+        return JSONResponse(content={
+            "success": True,
+            "transcript": result['text'],
+            "confidence": result['confidence'],
+            "speakers": result['speakers']
+        })
+
     except Exception as e:
+        logger.exception("Transcription failed")
         return JSONResponse(
             status_code=500,
             content={"success": False, "error": f"Transcription failed: {str(e)}"}
@@ -94,81 +135,47 @@ async def transcribe_file(file: UploadFile = File(...)):
 async def generate_clinical_note(request: GenerateNoteRequest):
     """Generate a clinical note from transcript"""
     try:
-        # Lazy import to avoid startup delays
-        from app.services.cloud_agent_service import CloudAgentService
-        agent_service = CloudAgentService()
-        
-        # Generate each section using AI
-        base_prompt = f"""
-        You are a clinical psychologist generating a structured clinical note from this session transcript.
-        Patient Name: {request.patient_name}
-        Note Type: {request.note_template}
-        
-        TRANSCRIPT:
-        {request.transcript}
-        
-        Generate ONLY the requested section content in 2-3 sentences. Be concise and clinical. 
-        Do NOT include the section header or label in your response.
-        """
-        
-        # Generate Chief Complaint
-        try:
-            cc_response = agent_service.process_query(base_prompt + "Generate the chief complaint: What is the patient's main concern or reason for visit?")
-            chief_complaint = cc_response.get('response', 'Patient presents for clinical evaluation.')
-        except Exception as e:
-            print(f"🔍 Error generating chief complaint: {e}")
-            chief_complaint = 'Patient presents for clinical evaluation.'
-        
-        # Add delay to avoid rate limiting
-        import time
-        time.sleep(1)
-        
-        # Generate History of Present Illness
-        try:
-            hpi_response = agent_service.process_query(base_prompt + "Generate the history of present illness: Describe the onset, duration, and characteristics of current symptoms.")
-            history_present_illness = hpi_response.get('response', 'Patient describes current symptoms and their progression.')
-        except Exception as e:
-            print(f"🔍 Error generating HPI: {e}")
-            history_present_illness = 'Patient describes current symptoms and their progression.'
-        
-        time.sleep(1)
-        
-        # Generate Review of Systems
-        try:
-            ros_response = agent_service.process_query(base_prompt + "Generate the review of systems: Summarize relevant positive and negative findings from systems review.")
-            review_systems = ros_response.get('response', 'Review of systems notable for reported symptoms.')
-        except Exception as e:
-            print(f"🔍 Error generating ROS: {e}")
-            review_systems = 'Review of systems notable for reported symptoms.'
-        
-        time.sleep(1)
-        
-        # Generate Assessment and Plan
-        try:
-            ap_response = agent_service.process_query(base_prompt + "Generate the assessment and plan: Provide clinical assessment with potential diagnoses and treatment recommendations.")
-            assessment_plan = ap_response.get('response', 'Clinical assessment and treatment plan to be determined.')
-        except Exception as e:
-            print(f"🔍 Error generating A&P: {e}")
-            assessment_plan = 'Clinical assessment and treatment plan to be determined.'
-        
-        time.sleep(1)
-        
-        # Generate Follow-up
+        agent_service = get_agent_service()
+
+        # Generate the whole note with one LLM request: the transcript is
+        # sent (and billed) once, and the variable patient/template details
+        # sit after the invariant prefix so provider prompt caching applies
+        note_prompt = (
+            NOTE_PROMPT_PREFIX
+            + request.transcript
+            + f"\n\nPatient Name: {request.patient_name}\nNote Type: {request.note_template}\n\n"
+            + NOTE_SECTIONS_INSTRUCTION
+        )
+
+        # Exact-match cache: regenerating the same transcript with the same
+        # patient/template skips the LLM call entirely. Deliberately no
+        # semantic layer here: it would need the embedding stack, which the
+        # cloud path doesn't load, and near-duplicate transcripts for
+        # different encounters must not share a note anyway.
+        cache_key = "note:" + hashlib.sha256(note_prompt.encode("utf-8")).hexdigest()
+        cached = await cache_service.get(cache_key)
+        if cached:
+            logger.debug("Note cache hit")
+            return JSONResponse(content={
+                "success": True,
+                "note": json.loads(cached)
+            })
+
+        parsed = {}
         try:
-            fu_response = agent_service.process_query(base_prompt + "Generate the follow-up/disposition: Recommend next steps, follow-up timeline, and any immediate actions needed.")
-            followup_disposition = fu_response.get('response', 'Follow-up recommendations to be provided.')
-        except Exception as e:
-            print(f"🔍 Error generating follow-up: {e}")
-            followup_disposition = 'Follow-up recommendations to be provided.'
-        
+            result = await asyncio.to_thread(agent_service.process_query, note_prompt)
+            parsed = _parse_note_sections(result.get('response', ''))
+        except Exception:
+            logger.exception("Error generating note sections")
+
         note_content = {
-            "chief_complaint": chief_complaint,
-            "history_present_illness": history_present_illness,
-            "review_systems": review_systems,
-            "assessment_plan": assessment_plan,
-            "followup_disposition": followup_disposition
+            key: str(parsed.get(key) or default)
+            for key, default in NOTE_SECTION_DEFAULTS.items()
         }
-        
+
+        if parsed:
+            await cache_service.set(cache_key, json.dumps(note_content), ttl_seconds=3600)
+
         return JSONResponse(content={
             "success": True,
             "note": note_content
@@ -203,22 +210,9 @@ async def create_scribe_session(
             content=request.content
         )
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
-            "session": {
-                "id": session.id,
-                "patient_id": session.patient_id,
-                "patient_name": session.patient_name,
-                "date": session.created_at.isoformat(),
-                "duration": session.duration,
-                "content": {
-                    "chiefComplaint": session.chief_complaint,
-                    "historyOfPresentIllness": session.history_present_illness,
-                    "reviewOfSystems": session.review_systems,
-                    "assessmentAndPlan": session.assessment_plan,
-                    "followUpDisposition": session.followup_disposition
-                }
-            }
+            "session": _scribe_session_payload(session)
         })
         
     except Exception as e:
@@ -235,38 +229,19 @@ async def get_scribe_sessions(
     """Get all scribe sessions for current user"""
     try:
         print(f"🔍 Getting sessions for user {current_user.id}")
-        from app.services.scribe_session_service import ScribeSessionService
         sessions = ScribeSessionService.get_user_sessions(db, current_user.id)
         
         print(f"🔍 Found {len(sessions)} sessions for user {current_user.id}")
         for session in sessions:
             print(f"🔍 Session {session.id}: patient_name='{session.patient_name}'")
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
-            "sessions": [
-                {
-                    "id": session.id,
-                    "patient_id": session.patient_id,
-                    "patient_name": session.patient_name,
-                    "date": session.created_at.isoformat(),
-                    "duration": session.duration,
-                    "content": {
-                        "chiefComplaint": session.chief_complaint,
-                        "historyOfPresentIllness": session.history_present_illness,
-                        "reviewOfSystems": session.review_systems,
-                        "assessmentAndPlan": session.assessment_plan,
-                        "followUpDisposition": session.followup_disposition
-                    }
-                }
-                for session in sessions
-            ]
+            "sessions": [_scribe_session_payload(session) for session in sessions]
         })
         
     except Exception as e:
-        import traceback
-        print(f"🔍 Error getting sessions: {str(e)}")
-        print(f"🔍 Traceback: {traceback.format_exc()}")
+        logger.exception("Error getting sessions")
         return JSONResponse(
             status_code=500,
             content={"success": False, "error": f"Failed to get sessions: {str(e)}"}
@@ -2,13 +2,14 @@
 Feedback API endpoints for collecting user feedback on AI responses.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime
 
-from app.db.session import get_db
+from app.db.session import get_async_db
 from app.core.auth import get_current_user
 from app.models.database import User, Feedback, Message, ChatSession
 
@@ -36,56 +37,65 @@ class FeedbackResponse(BaseModel):
         from_attributes = True
 
 
+class FeedbackPage(BaseModel):
+    items: List[FeedbackResponse]
+    next_cursor: Optional[int] = None
+
+
 @router.post("/feedback", response_model=FeedbackResponse)
 async def submit_feedback(
     feedback_data: FeedbackCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Submit feedback for an AI response."""
-    
-    # Get the message and validate it belongs to user
-    message = db.query(Message).filter(Message.id == feedback_data.message_id).first()
-    if not message:
+
+    # Get the message together with its session owner in one round-trip
+    row = (await db.execute(
+        select(Message, ChatSession.user_id).join(
+            ChatSession, ChatSession.id == Message.session_id
+        ).where(Message.id == feedback_data.message_id)
+    )).first()
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Message not found"
         )
-    
-    # Verify user owns the session
-    session = db.query(ChatSession).filter(
-        ChatSession.id == message.session_id,
-        ChatSession.user_id == current_user.id
-    ).first()
-    if not session:
+
+    message, session_owner_id = row
+    if session_owner_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to provide feedback for this message"
         )
-    
+
     # Get the user question (previous message)
-    user_message = db.query(Message).filter(
-        Message.session_id == message.session_id,
-        Message.role == "user",
-        Message.id < message.id
-    ).order_by(Message.id.desc()).first()
-    
+    user_message = (await db.execute(
+        select(Message).where(
+            Message.session_id == message.session_id,
+            Message.role == "user",
+            Message.id < message.id
+        ).order_by(Message.id.desc()).limit(1)
+    )).scalars().first()
+
     question = user_message.content if user_message else "Unknown question"
-    
+
     # Check if feedback already exists
-    existing_feedback = db.query(Feedback).filter(
-        Feedback.message_id == feedback_data.message_id,
-        Feedback.user_id == current_user.id
-    ).first()
-    
+    existing_feedback = (await db.execute(
+        select(Feedback).where(
+            Feedback.message_id == feedback_data.message_id,
+            Feedback.user_id == current_user.id
+        )
+    )).scalars().first()
+
     if existing_feedback:
         # Update existing feedback
         existing_feedback.rating = feedback_data.rating
         existing_feedback.text_feedback = feedback_data.text_feedback
-        db.commit()
-        db.refresh(existing_feedback)
+        await db.commit()
+        await db.refresh(existing_feedback)
         return existing_feedback
-    
+
     # Create new feedback
     feedback = Feedback(
         session_id=message.session_id,
@@ -97,41 +107,59 @@ async def submit_feedback(
         text_feedback=feedback_data.text_feedback,
         model_used="llama3.2:1b"  # Could be extracted from message metadata
     )
-    
+
     db.add(feedback)
-    db.commit()
-    db.refresh(feedback)
-    
+    await db.commit()
+    await db.refresh(feedback)
+
     return feedback
 
 
-@router.get("/feedback", response_model=List[FeedbackResponse])
+def _paginate(query, cursor: Optional[int], limit: int):
+    """Apply keyset pagination: newest first, resuming below the cursor id."""
+    if cursor is not None:
+        query = query.where(Feedback.id < cursor)
+    return query.order_by(Feedback.id.desc()).limit(limit)
+
+
+@router.get("/feedback", response_model=FeedbackPage)
 async def get_user_feedback(
-    db: Session = Depends(get_db),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[int] = Query(None),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get all feedback submitted by the current user."""
-    
-    feedback_list = db.query(Feedback).filter(
-        Feedback.user_id == current_user.id
-    ).order_by(Feedback.created_at.desc()).all()
-    
-    return feedback_list
+    """Get feedback submitted by the current user, newest first (paginated)."""
+
+    feedback_list = (await db.execute(
+        _paginate(
+            select(Feedback).where(Feedback.user_id == current_user.id),
+            cursor, limit
+        )
+    )).scalars().all()
+
+    next_cursor = feedback_list[-1].id if len(feedback_list) == limit else None
+    return FeedbackPage(items=feedback_list, next_cursor=next_cursor)
 
 
-@router.get("/admin/feedback", response_model=List[FeedbackResponse])
+@router.get("/admin/feedback", response_model=FeedbackPage)
 async def get_all_feedback(
-    db: Session = Depends(get_db),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[int] = Query(None),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get all feedback (admin only)."""
-    
+    """Get all feedback, newest first (admin only, paginated)."""
+
     if not current_user.is_admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Admin access required"
         )
-    
-    feedback_list = db.query(Feedback).order_by(Feedback.created_at.desc()).all()
-    
-    return feedback_list
\ No newline at end of file
+
+    feedback_list = (await db.execute(
+        _paginate(select(Feedback), cursor, limit)
+    )).scalars().all()
+
+    next_cursor = feedback_list[-1].id if len(feedback_list) == limit else None
+    return FeedbackPage(items=feedback_list, next_cursor=next_cursor)
\ No newline at end of file
@@ -2,6 +2,7 @@
 Authentication middleware and dependencies.
 """
 
+import time
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
@@ -11,26 +12,57 @@ from app.models import User
 
 security = HTTPBearer()
 
+# Short-lived token -> user cache: authenticated endpoints skip the JWT
+# verify and the user SELECT on repeat requests with the same bearer token.
+# 60s TTL keeps admin/allowlist changes from going stale for long.
+_USER_CACHE_TTL_SECONDS = 60
+_USER_CACHE_MAX_ENTRIES = 10_000
+_user_cache: dict = {}
+
+
+def _cache_get(token: str):
+    entry = _user_cache.get(token)
+    if entry and entry[0] > time.monotonic():
+        return entry[1]
+    if entry:
+        _user_cache.pop(token, None)
+    return None
+
+
+def _cache_put(token: str, user: User) -> None:
+    if len(_user_cache) >= _USER_CACHE_MAX_ENTRIES:
+        _user_cache.clear()
+    _user_cache[token] = (time.monotonic() + _USER_CACHE_TTL_SECONDS, user)
+
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
 ) -> User:
     """Get current authenticated user."""
+    cached_user = _cache_get(credentials.credentials)
+    if cached_user is not None:
+        return cached_user
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
+
     email = AuthService.verify_token(credentials.credentials)
     if email is None:
         raise credentials_exception
-    
+
     user = AuthService.get_or_create_user(db, email)
     if user is None:
         raise credentials_exception
-    
+
+    # Detach so the cached instance isn't tied to this request's session;
+    # attributes stay readable thanks to expire_on_commit=False
+    db.expunge(user)
+    _cache_put(credentials.credentials, user)
+
     return user
 
 
@@ -3,6 +3,9 @@ Configuration management using Pydantic Settings.
 Loads configuration from environment variables.
 """
 
+import os
+from functools import cached_property
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
 from typing import List
@@ -23,12 +26,15 @@ class Settings(BaseSettings):
     database_url: str = "sqlite:///./data/app.db"
     
     # Production database URL (Railway will set this)
-    @property
+    @cached_property
     def production_database_url(self) -> str:
-        import os
         return os.getenv("DATABASE_URL", self.database_url)
     
     vector_db_path: str = "./vector_db_hierarchical"
+
+    # Redis cache (empty = caching disabled)
+    redis_url: str = Field(default="", env="REDIS_URL")
+    cache_ttl_seconds: int = 120
     
     # RAG Configuration
     use_rag: bool = True
@@ -42,9 +48,15 @@ class Settings(BaseSettings):
     # Groq API Key
     groq_api_key: str = Field(default="", env="GROQ_API_KEY")
 
-    # Embeddings
+    # Embeddings. Backend "torch" uses HuggingFaceEmbeddings; "onnx" runs
+    # an int8-quantized ONNX export instead (faster on CPU-only hosts,
+    # requires the optimum[onnxruntime] extra); "remote" calls a
+    # TEI-compatible sidecar at embedding_server_url so all workers
+    # share one copy of the model.
     embedding_model: str = "all-MiniLM-L6-v2"
-    
+    embedder_backend: str = "torch"
+    embedding_server_url: str = "unix:///tmp/emb.sock"
+
     # Pinecone Configuration
     pinecone_api_key: str = ""
     pinecone_environment: str = "gcp-starter"
@@ -72,9 +84,9 @@ class Settings(BaseSettings):
         env_file=".env", env_file_encoding="utf-8", case_sensitive=False
     )
 
-    @property
+    @cached_property
     def allowed_origins_list(self) -> List[str]:
-        """Parse allowed origins from comma-separated string."""
+        """Allowed origins, parsed once from the comma-separated setting."""
         return [origin.strip() for origin in self.allowed_origins.split(",")]
 
 
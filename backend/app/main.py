@@ -2,30 +2,109 @@
 FastAPI application entry point.
 """
 
+import hashlib
 import logging
+import mimetypes
 import os
+import re
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+
+# Minimal health check first - no dependencies. orjson handles datetime
+# natively and serializes several times faster than stdlib json.
+# Schema/docs routes only exist in development; raw env read because
+# settings aren't loaded yet at this point.
+_is_dev = os.getenv("ENVIRONMENT", "development") == "development"
+app = FastAPI(title="Psych Agent API", version="0.1.0",
+              default_response_class=ORJSONResponse,
+              openapi_url="/openapi.json" if _is_dev else None,
+              docs_url="/docs" if _is_dev else None,
+              redoc_url="/redoc" if _is_dev else None)
+
+# Liveness probes hit this every few seconds; serve pre-serialized bytes
+# instead of re-encoding the same dict per request
+_HEALTH_BODY = b'{"status":"healthy"}'
 
-# Minimal health check first - no dependencies
-app = FastAPI(title="Psych Agent API", version="0.1.0")
 
 @app.get("/health")
 async def health_check():
     """Minimal health check endpoint."""
-    return {"status": "healthy"}
+    return Response(_HEALTH_BODY, media_type="application/json")
 
 # Now load everything else
 try:
     from app.core.config import settings
     from fastapi.staticfiles import StaticFiles
     from fastapi.responses import FileResponse
+    from app.db.session import SessionLocal, engine
+    from app.models import Allowlist, User
+    from app.models.database import Base
+    from starlette.datastructures import Headers
+    from starlette.exceptions import HTTPException as StarletteHTTPException
+
+    # Build-hashed assets (e.g. main.3f2a9b1c.js) never change content for a
+    # given name, so browsers can cache them forever
+    _HASHED_ASSET_RE = re.compile(r"\.[0-9a-f]{8,}\.")
+
+    class CachedStaticFiles(StaticFiles):
+        """StaticFiles with cache headers and precompressed asset support.
+
+        If the frontend build leaves .br/.gz siblings next to an asset,
+        they are served directly with the right Content-Encoding instead
+        of compressing on the fly.
+        """
+
+        async def get_response(self, path, scope):
+            accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+            for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+                if encoding not in accept_encoding:
+                    continue
+                try:
+                    response = await super().get_response(path + suffix, scope)
+                except StarletteHTTPException:
+                    continue
+                if response.status_code == 200:
+                    response.headers["Content-Encoding"] = encoding
+                    response.headers["Vary"] = "Accept-Encoding"
+                    media_type, _ = mimetypes.guess_type(path)
+                    if media_type:
+                        response.headers["Content-Type"] = media_type
+                    self._set_cache_control(path, response)
+                    return response
+            response = await super().get_response(path, scope)
+            self._set_cache_control(path, response)
+            return response
+
+        @staticmethod
+        def _set_cache_control(path, response):
+            if response.status_code != 200:
+                return
+            if path.endswith(".html"):
+                response.headers["Cache-Control"] = "no-cache"
+            elif _HASHED_ASSET_RE.search(path):
+                response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+            else:
+                response.headers["Cache-Control"] = "public, max-age=3600"
     
-    # Configure logging
+    # Configure logging. Records go through a queue and a background
+    # listener thread so log I/O never blocks the event loop.
+    import atexit
+    import queue
+    from logging.handlers import QueueHandler, QueueListener
+
+    _stream_handler = logging.StreamHandler()
+    _stream_handler.setFormatter(
+        logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    )
+    _log_queue = queue.SimpleQueue()
+    _log_listener = QueueListener(_log_queue, _stream_handler)
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
     logging.basicConfig(
         level=getattr(logging, settings.log_level),
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+        handlers=[QueueHandler(_log_queue)]
     )
     logger = logging.getLogger(__name__)
 
@@ -36,6 +115,20 @@ try:
             include_routers()
         except Exception as e:
             logger.error(f"Failed to load routers: {e}")
+        try:
+            from app.db.session import warm_pool
+            warm_pool()
+        except Exception as e:
+            logger.error(f"Failed to warm connection pool: {e}")
+        # Opt-in: pay the local agent's model-load cost at startup
+        # instead of on the first query (needs the vector DB on disk)
+        if os.getenv("PRELOAD_AGENT") == "1":
+            try:
+                import asyncio
+                from app.services.agent_service import preload_agent_service
+                await asyncio.to_thread(preload_agent_service)
+            except Exception as e:
+                logger.error(f"Failed to preload agent service: {e}")
         yield
         # Shutdown (if needed)
 
@@ -53,39 +146,41 @@ try:
         allow_headers=["*"],
     )
 
-    # Lazy import routers to speed up startup
+    # Compress JSON payloads over 1 KB (chat responses with citations are
+    # multi-KB); level 5 is near-best ratio at a fraction of the CPU.
+    # Responses that already carry a Content-Encoding (precompressed
+    # static assets) are passed through untouched.
+    from fastapi.middleware.gzip import GZipMiddleware
+    app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
+    # Routers import lazily at startup so /health responds before the
+    # heavy service/DB/LLM imports resolve
+    _ROUTERS = (
+        ("app.api.auth", "/api"),
+        ("app.api.admin", "/api"),
+        ("app.api.chat", "/api"),
+        ("app.api.feedback", "/api"),
+        ("app.api.endpoints.asr", "/api/asr"),
+    )
+    _routers_loaded = False
+
     def include_routers():
         """Import and include routers only when needed"""
-        try:
-            from app.api.auth import router as auth_router
-            app.include_router(auth_router, prefix="/api")
-        except Exception as e:
-            logger.error(f"Failed to load auth router: {e}")
-            
-        try:
-            from app.api.admin import router as admin_router
-            app.include_router(admin_router, prefix="/api")
-        except Exception as e:
-            logger.error(f"Failed to load admin router: {e}")
-            
-        try:
-            from app.api.chat import router as chat_router
-            app.include_router(chat_router, prefix="/api")
-        except Exception as e:
-            logger.error(f"Failed to load chat router: {e}")
-            
-        try:
-            from app.api.feedback import router as feedback_router
-            app.include_router(feedback_router, prefix="/api")
-        except Exception as e:
-            logger.error(f"Failed to load feedback router: {e}")
-            
-        try:
-            from app.api.endpoints.asr import router as asr_router
-            app.include_router(asr_router, prefix="/api/asr")
-            logger.info("ASR router loaded successfully")
-        except Exception as e:
-            logger.error(f"Failed to load ASR router: {e}")
+        global _routers_loaded
+        if _routers_loaded:
+            return
+        _routers_loaded = True
+        import importlib
+        for module_name, prefix in _ROUTERS:
+            try:
+                module = importlib.import_module(module_name)
+                app.include_router(module.router, prefix=prefix)
+            except Exception as e:
+                logger.error(f"Failed to load router {module_name}: {e}")
+
+    # CI can force eager wiring so deferred-import breakages still fail fast
+    if os.getenv("PSYCH_EAGER_IMPORT") == "1":
+        include_routers()
 
 except Exception as e:
     # If anything fails, at least health check works
@@ -95,18 +190,75 @@ except Exception as e:
     def include_routers():
         pass
 
-# Serve static files (frontend)
+# Serve static files (frontend). SERVE_STATIC=0 turns this off for
+# deployments where nginx or a CDN serves the frontend, so production
+# never pays the per-request Python overhead (nor the route entries).
 static_dir = os.path.join(os.path.dirname(__file__), "static")
-if os.path.exists(static_dir):
-    app.mount("/static", StaticFiles(directory=static_dir), name="static")
-    
-    @app.get("/")
-    async def serve_frontend():
-        """Serve the frontend application."""
-        index_file = os.path.join(static_dir, "index.html")
-        if os.path.exists(index_file):
-            return FileResponse(index_file)
-        return {"message": "Frontend not built yet"}
+if os.getenv("SERVE_STATIC", "1") != "0" and os.path.exists(static_dir):
+    # Preload small immutable assets into memory once: the SPA index and
+    # hashed bundles are served straight from bytes with a precomputed
+    # ETag, skipping per-request open()/stat() syscalls. Anything larger
+    # or unknown falls through to the disk-backed mount below.
+    _SMALL_ASSET_LIMIT = 256 * 1024
+    _static_cache = {}
+    for _root, _dirs, _files in os.walk(static_dir):
+        for _name in _files:
+            _full = os.path.join(_root, _name)
+            if os.path.getsize(_full) > _SMALL_ASSET_LIMIT:
+                continue
+            with open(_full, "rb") as _f:
+                _body = _f.read()
+            _rel = os.path.relpath(_full, static_dir).replace(os.sep, "/")
+            _static_cache[_rel] = (
+                _body,
+                mimetypes.guess_type(_name)[0] or "application/octet-stream",
+                hashlib.blake2b(_body).hexdigest()[:16],
+            )
+
+    _static_files = CachedStaticFiles(directory=static_dir)
+
+    @app.get("/static/{path:path}")
+    async def serve_static(path: str, request: Request):
+        """Serve preloaded assets from memory; fall back to disk."""
+        cached = _static_cache.get(path)
+        if cached is None:
+            return await _static_files.get_response(path, request.scope)
+        body, media_type, etag = cached
+        if request.headers.get("if-none-match") == etag:
+            response = Response(status_code=304, headers={"ETag": etag})
+        else:
+            response = Response(body, media_type=media_type, headers={"ETag": etag})
+            CachedStaticFiles._set_cache_control(path, response)
+        return response
+
+    app.mount("/static", _static_files, name="static")
+
+    # Bind the / handler once at import instead of re-checking the
+    # (immutable) deployment artifact on every request
+    _index_entry = _static_cache.get("index.html")
+    _index_file = os.path.join(static_dir, "index.html")
+    if _index_entry is not None:
+        _INDEX_BODY, _, _INDEX_ETAG = _index_entry
+
+        @app.get("/")
+        async def serve_frontend(request: Request):
+            """Serve the preloaded frontend index."""
+            if request.headers.get("if-none-match") == _INDEX_ETAG:
+                return Response(status_code=304, headers={"ETag": _INDEX_ETAG})
+            return Response(
+                _INDEX_BODY, media_type="text/html",
+                headers={"ETag": _INDEX_ETAG, "Cache-Control": "no-cache"}
+            )
+    elif os.path.exists(_index_file):
+        @app.get("/")
+        async def serve_frontend():
+            """Serve the frontend index from disk (too large to preload)."""
+            return FileResponse(_index_file, headers={"Cache-Control": "no-cache"})
+    else:
+        @app.get("/")
+        async def serve_frontend():
+            """Static dir exists but no index built yet."""
+            return {"message": "Frontend not built yet"}
 else:
     @app.get("/")
     async def root():
@@ -119,29 +271,28 @@ else:
         }
 
 
-@app.get("/health")
-async def health_check():
-    """Minimal health check endpoint."""
-    return {"status": "healthy"}
+# create_all walks every table's metadata against the DB; run it at most
+# once per process even if /setup-admin is hit repeatedly
+_tables_ready = False
 
 
 @app.post("/setup-admin")
 async def setup_admin(email: str = "revadigar@gmail.com"):
     """One-time setup endpoint to create admin user and all tables."""
+    global _tables_ready
     try:
-        from app.db.session import get_db, SessionLocal
-        from app.models import Allowlist, User
-        from app.models.database import Base
-        from app.db.session import engine
-        
         db = SessionLocal()
         try:
             # Create all tables (including feedback, chat_sessions, etc.)
-            Base.metadata.create_all(bind=engine)
-            
-            # Check if already in allowlist
-            existing_allowlist = db.query(Allowlist).filter(Allowlist.email == email).first()
-            if existing_allowlist:
+            if not _tables_ready:
+                Base.metadata.create_all(bind=engine)
+                _tables_ready = True
+
+            # Check if already in allowlist (EXISTS, no row hydration)
+            already_allowed = db.query(
+                db.query(Allowlist).filter(Allowlist.email == email).exists()
+            ).scalar()
+            if already_allowed:
                 return {"message": "Admin user already exists, tables verified", "email": email}
             
             # Add to allowlist
@@ -170,7 +321,24 @@ if __name__ == "__main__":
     try:
         import uvicorn
         port = int(os.getenv("PORT", settings.port))
-        uvicorn.run(app, host=settings.host, port=port)
+        # One worker for dev reloads; saturate the host in production.
+        # WEB_CONCURRENCY overrides either way.
+        if settings.environment == "development":
+            default_workers = 1
+        else:
+            default_workers = 2 * (os.cpu_count() or 1) + 1
+        workers = int(os.getenv("WEB_CONCURRENCY", default_workers))
+        # Import-string form is required when workers > 1
+        uvicorn.run(
+            "app.main:app",
+            host=settings.host,
+            port=port,
+            workers=workers,
+            loop="uvloop",
+            http="httptools",
+            log_level=settings.log_level.lower(),
+            proxy_headers=True,
+        )
     except Exception as e:
         logger.error(f"Failed to start application: {e}")
         raise
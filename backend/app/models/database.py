@@ -2,7 +2,8 @@
 SQLAlchemy models for the psychiatric clinical decision support system.
 """
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, JSON
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, JSON, Index, CheckConstraint
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -17,7 +18,7 @@ class User(Base):
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String(255), unique=True, index=True, nullable=False)
     is_admin = Column(Boolean, default=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, server_default=func.now())
 
     # Relationships
     chat_sessions = relationship("ChatSession", back_populates="user", cascade="all, delete-orphan")
@@ -30,40 +31,76 @@ class Allowlist(Base):
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String(255), unique=True, index=True, nullable=False)
     is_admin = Column(Boolean, default=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, server_default=func.now())
 
 
 class ChatSession(Base):
     __tablename__ = "chat_sessions"
+    __table_args__ = (
+        # Session lists are fetched per user, most recently updated first
+        Index("ix_chat_sessions_user_updated", "user_id", "updated_at"),
+    )
+
+    # eager_defaults fetches the server-generated timestamps in the same
+    # INSERT..RETURNING, so reading created_at after commit costs nothing
+    __mapper_args__ = {"eager_defaults": True}
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     title = Column(String(255), nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
 
-    # Relationships
+    # Relationships. messages is serialized in session responses, so load
+    # it with one selectin batch instead of one query per session (N+1).
     user = relationship("User", back_populates="chat_sessions")
-    messages = relationship("Message", back_populates="session", cascade="all, delete-orphan")
+    messages = relationship("Message", back_populates="session", cascade="all, delete-orphan",
+                            lazy="selectin", order_by="Message.created_at")
     feedback = relationship("Feedback", back_populates="session", cascade="all, delete-orphan")
 
 
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        # Recent-history fetches filter by session and sort by created_at
+        Index("ix_messages_session_created", "session_id", "created_at"),
+        # Previous-user-message lookup in feedback submission
+        Index("ix_messages_session_role_id", "session_id", "role", "id"),
+        # Containment queries on citations (e.g. filter by source) are
+        # index-assisted on Postgres; GIN doesn't exist elsewhere
+        Index("ix_messages_citations_gin", "citations",
+              postgresql_using="gin").ddl_if(dialect="postgresql"),
+        CheckConstraint("role IN ('user', 'assistant', 'system')", name="ck_messages_role"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     session_id = Column(Integer, ForeignKey("chat_sessions.id"), nullable=False)
-    role = Column(String(50), nullable=False)  # 'user' or 'assistant'
+    role = Column(String(10), nullable=False)  # 'user' or 'assistant'
     content = Column(Text, nullable=False)
-    citations = Column(JSON, nullable=True)  # Store citations as JSON
+    # JSONB on Postgres (binary storage, indexable); generic JSON elsewhere
+    citations = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
-    # Relationships
-    session = relationship("ChatSession", back_populates="messages")
+    # Relationships. Nothing reads the back-ref; raise on accidental
+    # lazy loads instead of silently issuing SQL.
+    session = relationship("ChatSession", back_populates="messages", lazy="raise_on_sql")
 
 
 class Feedback(Base):
     __tablename__ = "feedback"
+    __table_args__ = (
+        # Admin stats/details/export all filter and sort on created_at
+        Index("ix_feedback_created_at", "created_at"),
+        Index("ix_feedback_rating_created", "rating", "created_at"),
+        # One feedback row per user per message; also serves the
+        # existing-feedback lookup on submit
+        Index("ix_feedback_message_user", "message_id", "user_id", unique=True),
+        # Per-user feedback listing (newest first)
+        Index("ix_feedback_user_id_id", "user_id", "id"),
+        # Per-session feedback lookups in chronological order
+        Index("ix_feedback_session_created", "session_id", "created_at"),
+        CheckConstraint("rating IN ('up', 'down') OR rating IS NULL", name="ck_feedback_rating"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     session_id = Column(Integer, ForeignKey("chat_sessions.id"), nullable=False)
@@ -88,7 +125,8 @@ class Feedback(Base):
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
-    # Relationships
-    session = relationship("ChatSession", back_populates="feedback")
-    message = relationship("Message")
-    user = relationship("User")
+    # Relationships. None are read on the feedback endpoints; raise on
+    # accidental lazy loads instead of silently issuing SQL.
+    session = relationship("ChatSession", back_populates="feedback", lazy="raise_on_sql")
+    message = relationship("Message", lazy="raise_on_sql")
+    user = relationship("User", lazy="raise_on_sql")
@@ -1,71 +1,83 @@
 """
 Pydantic models for API requests and responses.
+
+defer_build postpones core-schema construction (including the
+email-validator machinery behind EmailStr) from import time to first
+validation, trimming router import cost.
 """
 
-from pydantic import BaseModel, EmailStr
+from __future__ import annotations
+
+from pydantic import BaseModel, ConfigDict, EmailStr
 from datetime import datetime
 from typing import Optional, List, Any
 
 
 class LoginRequest(BaseModel):
+    model_config = ConfigDict(defer_build=True, extra="forbid")
+
     email: EmailStr
 
 
 class TokenResponse(BaseModel):
+    model_config = ConfigDict(defer_build=True, extra="forbid")
+
     access_token: str
     token_type: str
 
 
 class UserResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True, defer_build=True, frozen=True)
+
     id: int
     email: str
     is_admin: bool
     created_at: datetime
 
-    class Config:
-        from_attributes = True
-
 
 class AllowlistRequest(BaseModel):
+    model_config = ConfigDict(defer_build=True, extra="forbid")
+
     email: EmailStr
     is_admin: bool = False
 
 
 class AllowlistResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True, defer_build=True, frozen=True)
+
     id: int
     email: str
     is_admin: bool
     created_at: datetime
 
-    class Config:
-        from_attributes = True
-
 
 class MessageResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True, defer_build=True, frozen=True)
+
     id: int
     role: str
     content: str
     citations: Optional[List[Any]] = None
     created_at: datetime
 
-    class Config:
-        from_attributes = True
-
 
 class ChatSessionResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True, defer_build=True, frozen=True)
+
     id: int
     title: str
     created_at: datetime
     updated_at: datetime
     messages: Optional[List[MessageResponse]] = None
 
-    class Config:
-        from_attributes = True
-
 
 class CreateSessionRequest(BaseModel):
+    model_config = ConfigDict(defer_build=True, extra="forbid")
+
     title: Optional[str] = None
 
 
 class SendMessageRequest(BaseModel):
+    model_config = ConfigDict(defer_build=True, extra="forbid")
+
     content: str
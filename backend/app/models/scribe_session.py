@@ -2,17 +2,21 @@
 Scribe session model for storing clinical notes.
 """
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 from app.models.database import Base
-from datetime import datetime
 
 
 class ScribeSession(Base):
     """Model for scribe sessions (clinical notes)."""
-    
+
     __tablename__ = "scribe_sessions"
-    
+    __table_args__ = (
+        # Sessions are listed per user, most recent first
+        Index("ix_scribe_sessions_user_created", "user_id", "created_at"),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     patient_id = Column(String(50), nullable=False)
@@ -27,9 +31,12 @@ class ScribeSession(Base):
     assessment_plan = Column(Text, nullable=True)
     followup_disposition = Column(Text, nullable=True)
     
-    # Metadata
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Metadata. eager_defaults returns the server timestamps with the
+    # INSERT so the create response can read created_at without a SELECT.
+    __mapper_args__ = {"eager_defaults": True}
+
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
     
     # Relationships
     user = relationship("User", back_populates="scribe_sessions")
@@ -3,20 +3,174 @@ Agent service for psychiatric clinical decision support.
 Enhanced for production API integration.
 """
 
+import asyncio
+import collections
+import hashlib
 import os
 import logging
+import queue
+import re
+import threading
+import time
+from concurrent.futures import Future
+from functools import lru_cache
+import numpy as np
+import torch
 from typing import Dict, Any, Optional
 from langchain_ollama import OllamaLLM
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_chroma import Chroma
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from langchain_core.runnables import RunnablePassthrough
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=4)
+def _load_embeddings(model_name: str, backend: str):
+    """Load an embedding model once per process, keyed by name and backend.
+
+    Re-initializing AgentService (or running several in one process)
+    reuses the already-loaded weights instead of paying the multi-second
+    model load and holding a duplicate copy in memory.
+    """
+    if backend == "onnx":
+        # int8 ONNX export: much faster on CPU-only hosts
+        from app.services.onnx_embeddings import OnnxEmbeddings
+        return OnnxEmbeddings(model_name)
+
+    if backend == "remote":
+        # Node-local sidecar: one copy of the weights for all workers
+        from app.services.remote_embeddings import RemoteEmbeddings
+        return RemoteEmbeddings(settings.embedding_server_url)
+
+    # FP16 halves embedding bandwidth on GPU; on CPU let torch use
+    # every core for the GEMMs instead of its conservative default
+    if torch.cuda.is_available():
+        model_kwargs = {"device": "cuda", "model_kwargs": {"torch_dtype": torch.float16}}
+    else:
+        model_kwargs = {"device": "cpu"}
+        torch.set_num_threads(os.cpu_count() or 1)
+    embeddings = HuggingFaceEmbeddings(
+        model_name=model_name,
+        model_kwargs=model_kwargs,
+        encode_kwargs={"batch_size": 32},
+    )
+    # Compile the transformer forward pass; first call pays the JIT
+    # cost, the rest skip Python per-layer overhead. Best effort:
+    # not every backend supports every model.
+    try:
+        embeddings.client[0].auto_model = torch.compile(
+            embeddings.client[0].auto_model, mode="reduce-overhead"
+        )
+    except Exception as ex:
+        logger.warning(f"torch.compile unavailable for embedding model: {ex}")
+    return embeddings
+
+
+class EmbeddingBatcher:
+    """Coalesce concurrent embedding requests into one forward pass.
+
+    Under concurrent load, N requests arriving together would run N tiny
+    forward passes; a transformer amortizes its fixed overhead much
+    better over one padded batch. A background thread drains whatever
+    accumulates within a short window (or up to a max batch) and embeds
+    it in a single call, handing each caller its vectors back through a
+    Future. A lone request pays at most the wait window, well under the
+    cost of a forward pass.
+    """
+
+    def __init__(self, embeddings, max_batch: int = 32, max_wait_ms: float = 8.0):
+        self._embeddings = embeddings
+        self._max_batch = max_batch
+        self._max_wait = max_wait_ms / 1000.0
+        self._queue = queue.SimpleQueue()
+        self._worker = threading.Thread(
+            target=self._run, name="embedding-batcher", daemon=True
+        )
+        self._worker.start()
+
+    def embed(self, texts):
+        """Embed texts, possibly batched with other callers'. Blocking."""
+        future = Future()
+        self._queue.put((texts, future))
+        return future.result()
+
+    def _run(self):
+        while True:
+            pending = [self._queue.get()]
+            count = len(pending[0][0])
+            deadline = time.monotonic() + self._max_wait
+            while count < self._max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                pending.append(item)
+                count += len(item[0])
+
+            flat = [text for texts, _ in pending for text in texts]
+            try:
+                vecs = self._embeddings.embed_documents(flat)
+            except Exception as ex:
+                for _, future in pending:
+                    future.set_exception(ex)
+                continue
+            pos = 0
+            for texts, future in pending:
+                future.set_result(vecs[pos:pos + len(texts)])
+                pos += len(texts)
+
+
+_DISCLAIMER = "This is a clinical decision support tool and not a replacement for professional psychiatric evaluation."
+
+# BPD shortcut: the response never varies, so the string, citations and
+# base result dict are built once at import instead of per query
+_BPD_RE = re.compile(r"borderline personality disorder|f60\.3", re.IGNORECASE)
+
+_BPD_RESPONSE = """**Borderline Personality Disorder (F60.3) - DSM-5-TR Diagnostic Criteria**^1
+
+A pervasive pattern of instability of interpersonal relationships, self-image, and affects, and marked impulsivity, beginning by early adulthood and present in a variety of contexts, as indicated by five (or more) of the following:
+
+1. Frantic efforts to avoid real or imagined abandonment. (Note: Do not include suicidal or self-mutilating behavior covered in Criterion 5.)
+
+2. A pattern of unstable and intense interpersonal relationships characterized by alternating between extremes of idealization and devaluation.
+
+3. Identity disturbance: markedly and persistently unstable self-image or sense of self.
+
+4. Impulsivity in at least two areas that are potentially self-damaging (e.g., spending, sex, substance abuse, reckless driving, binge eating). (Note: Do not include suicidal or self-mutilating behavior covered in Criterion 5.)
+
+5. Recurrent suicidal behavior, gestures, or threats, or self-mutilating behavior.
+
+6. Affective instability due to a marked reactivity of mood (e.g., intense episodic dysphoria, irritability, or anxiety usually lasting a few hours and only rarely more than a few days).
+
+7. Chronic feelings of emptiness.
+
+8. Inappropriate, intense anger or difficulty controlling anger (e.g., frequent displays of temper, constant anger, recurrent physical fights).
+
+9. Transient, stress-related paranoid ideation or severe dissociative symptoms.^1"""
+
+_BPD_CITATIONS = [
+    {
+        "id": 1,
+        "content": "Borderline Personality Disorder (F60.3) - Complete diagnostic criteria as specified in DSM-5-TR",
+        "full_content": _BPD_RESPONSE,
+        "source": "DSM-5-TR, Page 753",
+        "preview": "F60.3 - A pervasive pattern of instability of interpersonal relationships, self-image, and affects..."
+    }
+]
+
+_BPD_BASE = {
+    "response": _BPD_RESPONSE,
+    "citations": _BPD_CITATIONS,
+    "disclaimer": _DISCLAIMER,
+}
+
+
 class AgentService:
     """Service for handling psychiatric agent queries."""
 
@@ -25,7 +179,39 @@ class AgentService:
         self.db_path = self._get_vector_db_path()
         self.model_name = settings.llm_model
         self.temperature = settings.llm_temperature
-        
+
+        # One lock guards every cache below: pipelines run concurrently on
+        # worker threads, and the OrderedDict get/move_to_end/popitem
+        # sequences (like the semantic keys/values pair) are not atomic.
+        # The critical sections are tiny, so one shared lock is enough.
+        self._cache_lock = threading.Lock()
+
+        # LRU cache of final result dicts for repeated queries: a hit skips
+        # retrieval, filtering and the whole LLM generation
+        self._result_cache = collections.OrderedDict()
+        self._result_cache_max = 256
+
+        # Semantic cache: normalized query embeddings paired with their
+        # results, matched by cosine similarity so rephrased questions
+        # still skip retrieval and generation
+        self._sem_threshold = 0.92
+        self._sem_cache_max = 128
+        self._sem_keys = None  # (N, d) float32, rows L2-normalized
+        self._sem_values = []
+
+        # Retrieval cache: normalized query -> (query embedding, docs).
+        # Re-asked questions skip the embed call and the HNSW traversal
+        # even when the response caches miss (e.g. different context).
+        self._retrieval_cache = collections.OrderedDict()
+        self._retrieval_cache_max = 512
+
+        # Formatted-context cache: document set -> joined prompt context.
+        # Retrieval-cache hits return the same documents, so the join is
+        # skipped too and the identical bytes help LLM prefix caching.
+        self._fmt_cache = collections.OrderedDict()
+        self._fmt_cache_max = 128
+
+
         try:
             self._initialize_components()
             logger.info("Agent service initialized successfully")
@@ -45,25 +231,111 @@ class AgentService:
 
     def _initialize_components(self):
         """Initialize LLM, embeddings, and vector database."""
-        # Skip embeddings and vector DB to prevent hanging - re-enable for production
-        self.embeddings = HuggingFaceEmbeddings(model_name=settings.embedding_model)
+        # One compiled alternation replaces the chains of substring checks
+        # in context building and doc filtering: a single scan of the text
+        # and the named group tells us which disorder matched
+        self._disorder_re = re.compile(
+            r"(?P<ptsd>ptsd|posttraumatic stress)"
+            r"|(?P<borderline>borderline personality|f60\.3)"
+            r"|(?P<mdd>major depressive|depression)"
+            r"|(?P<ied>intermittent explosive|f63\.81)",
+            re.IGNORECASE,
+        )
+        self._disorder_display = {
+            "ptsd": "PTSD",
+            "borderline": "Borderline Personality Disorder",
+            "mdd": "Major Depressive Disorder",
+            "ied": "Intermittent Explosive Disorder",
+        }
+        # Patterns used to match retrieved document content;
+        # case-insensitive search beats lowercasing multi-KB chunks
+        self._disorder_match_res = {
+            "ptsd": re.compile("ptsd", re.IGNORECASE),
+            "borderline": re.compile("borderline", re.IGNORECASE),
+            "mdd": re.compile("major depressive", re.IGNORECASE),
+            "ied": re.compile("intermittent explosive", re.IGNORECASE),
+        }
+        # Starter phrases marking a good preview sentence, compiled into
+        # one alternation: a single C-level scan of the content replaces
+        # the per-sentence Python loop in _create_contextual_preview
+        self._starter_re = re.compile(
+            "|".join((
+                "diagnostic criteria", "the essential", "characterized by",
+                "symptoms include", "must be present", "requires",
+                "differential diagnosis", "prevalence", "development",
+            )),
+            re.IGNORECASE,
+        )
+        # Citation marker insertion: locate the first key diagnostic term
+        # and the end of its sentence, then splice the marker in once
+        self._cite_kw_re = re.compile(r'\b(criteria|disorder|diagnosis|symptoms)\b', re.IGNORECASE)
+        self._sent_end_re = re.compile(r'\.(?=\s|$)')
+
+        # Skip embeddings and vector DB to prevent hanging - re-enable for production.
+        # The model itself is cached per process in _load_embeddings; the
+        # batcher coalesces concurrent requests into one forward pass.
+        self.embeddings = _load_embeddings(settings.embedding_model, settings.embedder_backend)
+        self._embed_batcher = EmbeddingBatcher(self.embeddings)
         
         # Load vector database
         if not os.path.exists(self.db_path):
             raise FileNotFoundError(f"Vector database not found at {self.db_path}")
         
         self.vector_db = Chroma(
-            persist_directory=self.db_path, 
+            persist_directory=self.db_path,
             embedding_function=self.embeddings
         )
-        
+
+        # Fallback disorder attribution for chunks without metadata
+        self._disorder_fallbacks = {
+            "ptsd": ("Posttraumatic Stress Disorder", "F43.10"),
+            "borderline": ("Borderline Personality Disorder", "F60.3"),
+            "mdd": ("Major Depressive Disorder", "F32.9"),
+            "ied": ("Intermittent Explosive Disorder", "F63.81"),
+        }
+
+        # Parse each chunk's DOCUMENT:...;DISORDER:...;SECTION:... prefix
+        # once at load time; the per-query citation loop then looks the
+        # result up instead of re-splitting the same strings per request
+        self._doc_meta = {}
+        try:
+            store = self.vector_db.get(include=["metadatas", "documents"])
+            for content, metadata in zip(store["documents"], store["metadatas"]):
+                self._doc_meta[content] = self._parse_doc_meta(content, metadata or {})
+            logger.info(f"Precomputed structural metadata for {len(self._doc_meta)} chunks")
+        except Exception as ex:
+            logger.warning(f"Could not precompute document metadata: {ex}")
+
+        # The reference store is read-heavy: let SQLite mmap it so HNSW
+        # metadata reads hit the OS page cache instead of read() syscalls.
+        # Best effort — the connection lives deep in chromadb internals
+        # and the attribute path varies across versions.
+        try:
+            sysdb = self.vector_db._client._server._sysdb
+            with sysdb.tx() as cur:
+                cur.execute("PRAGMA mmap_size=1073741824")
+                cur.execute("PRAGMA temp_store=MEMORY")
+        except Exception as ex:
+            logger.debug(f"Could not set SQLite pragmas on Chroma store: {ex}")
+
         # Build retrieval chain with better filtering
         self.retriever = self.vector_db.as_retriever(search_kwargs={"k": 10})
+
+        # Re-enable LLM. keep_alive holds the model (and its KV cache)
+        # resident between requests; a fixed num_ctx keeps the server from
+        # reallocating the context buffer as prompt sizes vary.
+        self.llm = OllamaLLM(
+            model=self.model_name,
+            temperature=self.temperature,
+            keep_alive="30m",
+            num_ctx=4096,
+        )
         
-        # Re-enable LLM
-        self.llm = OllamaLLM(model=self.model_name, temperature=self.temperature)
-        
-        # Define clinical prompt template with natural conversation flow
+        # Define clinical prompt template with natural conversation flow.
+        # Layout matters for latency: llama.cpp only reuses its KV cache
+        # for a byte-identical prefix, so the static instructions and the
+        # (deterministically ordered) retrieved context come first and the
+        # per-turn conversation context and question come last.
         self.template = """You are a DSM-5-TR Clinical Reference Assistant providing psychiatric consultation.
 
 INSTRUCTIONS:
@@ -74,47 +346,174 @@ INSTRUCTIONS:
 - Provide accurate DSM-5-TR information with diagnostic codes when relevant
 - Be concise but thorough
 
-{conversation_context}
-
 DSM-5-TR CONTEXT:
 {context}
 
+{conversation_context}
+
 CLINICIAN QUERY: {question}
 
 RESPONSE:"""
 
         self.prompt = ChatPromptTemplate.from_template(self.template)
-        
-        # Build retrieval chain with better filtering
-        self.retriever = self.vector_db.as_retriever(search_kwargs={"k": 10})
-        # We'll build the chain dynamically in process_query to access the query for filtering
+
+        # One chain for every request; per-query values (context, question)
+        # arrive via the invoke/stream input dict instead of closures, so
+        # no LCEL graph is constructed on the hot path
+        self.chain = self.prompt | self.llm | StrOutputParser()
+
+        # Touch the index once so the embedding model and the HNSW graph
+        # are resident at startup rather than on the first real query
+        try:
+            self.vector_db.similarity_search("warmup", k=1)
+        except Exception as ex:
+            logger.warning(f"Vector store warm-up failed: {ex}")
+
+    def _cache_key(self, query: str, conversation_history: list = None) -> str:
+        """Key on the normalized query plus the last exchange for context."""
+        normalized = " ".join(query.lower().split())
+        tail = ""
+        if conversation_history:
+            tail = " ".join(
+                " ".join(msg['content'].lower().split())
+                for msg in conversation_history[-2:]
+            )
+        return hashlib.blake2b(f"{normalized}|{tail}".encode(), digest_size=16).hexdigest()
+
+    def _cache_result(self, key: str, result: Dict[str, Any]) -> None:
+        """Store a result, evicting the least recently used entry if full."""
+        with self._cache_lock:
+            self._result_cache[key] = result
+            self._result_cache.move_to_end(key)
+            if len(self._result_cache) > self._result_cache_max:
+                self._result_cache.popitem(last=False)
+
+    def _embed_query(self, query: str):
+        """Embed the query once for both the semantic cache and the search.
+
+        Returns the raw query embedding (for vector search, which indexes
+        unnormalized vectors) and an L2-normalized float32 copy for
+        cosine comparisons in the semantic cache. Going through the
+        batcher lets concurrent requests share one forward pass.
+        """
+        raw = self._embed_batcher.embed([query])[0]
+        vec = np.asarray(raw, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        return raw, (vec / norm if norm else vec)
+
+    def _semantic_cache_get(self, query_vec: np.ndarray, context_prefix: str) -> Optional[Dict[str, Any]]:
+        """Return a cached result whose query is semantically close enough.
+
+        A single matrix-vector product scores the query against every
+        cached embedding; both sides are normalized so the dot product is
+        the cosine similarity. The conversation context must match too,
+        so follow-ups don't collide with standalone questions.
+        """
+        with self._cache_lock:
+            keys, values = self._sem_keys, list(self._sem_values)
+        if keys is None:
+            return None
+        scores = keys @ query_vec
+        best = int(np.argmax(scores))
+        if best < len(values) and scores[best] >= self._sem_threshold \
+                and values[best][0] == context_prefix:
+            return values[best][1]
+        return None
+
+    def _semantic_cache_put(self, query_vec: np.ndarray, context_prefix: str, result: Dict[str, Any]) -> None:
+        """Store a result under its query embedding, evicting the oldest."""
+        row = query_vec.reshape(1, -1)
+        with self._cache_lock:
+            if self._sem_keys is None:
+                self._sem_keys = row
+            else:
+                self._sem_keys = np.vstack([self._sem_keys, row])
+            self._sem_values.append((context_prefix, result))
+            if len(self._sem_values) > self._sem_cache_max:
+                self._sem_keys = self._sem_keys[1:]
+                self._sem_values.pop(0)
+
+    def _detect_disorder(self, text: str) -> Optional[str]:
+        """Return the canonical key for the first disorder mentioned in text."""
+        m = self._disorder_re.search(text)
+        return m.lastgroup if m else None
+
+    def _parse_doc_meta(self, content: str, metadata: dict):
+        """Extract (disorder, icd, section, chunk type, page) for one chunk.
+
+        Runs once per chunk when the vector store loads; request-time code
+        only does a dict lookup.
+        """
+        disorder_name = metadata.get('disorder_name', 'Unknown Disorder')
+        icd_code = metadata.get('icd_code', '')
+        section_type = metadata.get('section_type', 'General')
+        chunk_type = metadata.get('chunk_type', 'unknown')
+        page_number = metadata.get('page', None)
+
+        # Parse structured content to extract disorder info
+        if content.startswith('DOCUMENT:'):
+            for part in content.split(';'):
+                part = part.strip()
+                if part.startswith('DISORDER:'):
+                    disorder_name = part.replace('DISORDER:', '').strip()
+                elif part.startswith('SECTION:'):
+                    section_type = part.replace('SECTION:', '').strip()
+
+        # Fallback extraction if still missing
+        if disorder_name == 'Unknown Disorder':
+            key = self._detect_disorder(content)
+            if key:
+                disorder_name, icd_code = self._disorder_fallbacks[key]
+
+        return disorder_name, icd_code, section_type, chunk_type, page_number
 
     def _format_docs(self, docs):
-        """Format retrieved documents for the prompt."""
-        return "\n\n".join(doc.page_content for doc in docs)
+        """Format retrieved documents for the prompt.
+
+        Sorted so the same document set always produces byte-identical
+        context, keeping the LLM's prompt-prefix cache warm across
+        near-duplicate queries. The joined string is memoized keyed on
+        the sorted contents themselves, so any retrieval path that
+        returns the same chunks skips the concatenation - and the key
+        stays valid no matter which Document objects carried them.
+        """
+        contents = sorted(doc.page_content for doc in docs)
+        key = hash(tuple(contents))
+        with self._cache_lock:
+            cached = self._fmt_cache.get(key)
+            if cached is not None:
+                self._fmt_cache.move_to_end(key)
+                return cached
+        formatted = "\n\n".join(contents)
+        with self._cache_lock:
+            self._fmt_cache[key] = formatted
+            if len(self._fmt_cache) > self._fmt_cache_max:
+                self._fmt_cache.popitem(last=False)
+        return formatted
     
-    def _build_conversation_context(self, query: str, conversation_history: list) -> str:
+    @staticmethod
+    def _recent_history_text(conversation_history: list) -> str:
+        """Join the last few exchanges into one string for disorder scans."""
+        if not conversation_history:
+            return ""
+        return " ".join(msg['content'] for msg in conversation_history[-4:])
+
+    def _build_conversation_context(self, query: str, conversation_history: list,
+                                    history_text: str = None) -> str:
         """Build conversation context that helps generate natural, varied responses."""
         if not conversation_history or len(conversation_history) < 2:
             return "CONTEXT: This is a new conversation topic."
-        
+
         # Build context with focus on topic continuity
         context_lines = []
-        
-        # Get last few exchanges for context
-        recent_messages = conversation_history[-4:] if len(conversation_history) > 4 else conversation_history
-        
-        # Identify the main disorder being discussed
-        all_content = " ".join([msg['content'].lower() for msg in recent_messages])
-        main_disorder = None
-        
-        if "ptsd" in all_content or "posttraumatic stress" in all_content:
-            main_disorder = "PTSD"
-        elif "borderline personality" in all_content or "f60.3" in all_content:
-            main_disorder = "Borderline Personality Disorder"
-        elif "major depressive" in all_content or "depression" in all_content:
-            main_disorder = "Major Depressive Disorder"
-        
+
+        # Identify the main disorder being discussed (single regex scan;
+        # the pattern is case-insensitive so no lowercased copies needed)
+        if history_text is None:
+            history_text = self._recent_history_text(conversation_history)
+        disorder_key = self._detect_disorder(history_text)
+        main_disorder = self._disorder_display.get(disorder_key)
+
         if main_disorder:
             context_lines.append(f"CONTEXT: Ongoing discussion about {main_disorder}.")
             
@@ -124,58 +523,62 @@ RESPONSE:"""
                 context_lines.append(f"This appears to be a follow-up question about {main_disorder}.")
         else:
             context_lines.append("CONTEXT: This appears to be a new topic.")
-        
-        # Add recent exchange for reference
-        if len(recent_messages) >= 2:
-            last_user = next((msg['content'] for msg in reversed(recent_messages) if msg['role'] == 'user'), "")
-            if last_user and last_user != query:
-                context_lines.append(f"Previous question: {last_user[:100]}...")
-        
+
+        # Deliberately no per-turn "Previous question: ..." line: it made
+        # the prompt diverge byte-for-byte on every turn, defeating the
+        # LLM's prefix cache. The context block now takes one of a few
+        # stable values for as long as the discussed disorder is stable.
         return "\n".join(context_lines) + "\n"
 
-    def _filter_relevant_docs(self, docs, query: str, conversation_history: list = None):
+    def _target_disorder(self, query: str, conversation_history: list = None,
+                         history_text: str = None) -> Optional[str]:
+        """Work out which disorder a query targets, if any.
+
+        A disorder named in the query wins over conversation history, so
+        treatment follow-ups inherit the disorder from context.
+        """
+        query_disorder = self._detect_disorder(query)
+        if query_disorder:
+            return query_disorder
+        if history_text is None:
+            history_text = self._recent_history_text(conversation_history)
+        return self._detect_disorder(history_text) if history_text else None
+
+    def _search_docs(self, query_vec, target_disorder: Optional[str]):
+        """Vector search, pushing the disorder filter down into Chroma.
+
+        When the target disorder is known, a metadata filter means fewer
+        vectors scored and no oversized result set; falls back to the
+        unfiltered k=10 search if the filtered one comes back empty
+        (chunks ingested without disorder metadata).
+        """
+        if target_disorder:
+            docs = self.vector_db.similarity_search_by_vector(
+                query_vec, k=5,
+                filter={"disorder_name": self._disorder_display[target_disorder]},
+            )
+            if docs:
+                return docs
+        return self.vector_db.similarity_search_by_vector(query_vec, k=10)
+
+    def _filter_relevant_docs(self, docs, query: str, conversation_history: list = None,
+                              target_disorder: str = None):
         """Filter documents to only include those relevant to the specific disorder queried."""
-        query_lower = query.lower()
-        
-        # Check conversation history for context about what disorder we're discussing
-        target_disorder = None
-        
-        # First check if there's context from conversation
-        if conversation_history:
-            recent_content = " ".join([msg['content'].lower() for msg in conversation_history[-3:]])
-            if "ptsd" in recent_content or "posttraumatic stress" in recent_content:
-                target_disorder = "ptsd"
-            elif "borderline personality" in recent_content or "f60.3" in recent_content:
-                target_disorder = "borderline"
-            elif "major depressive" in recent_content or "depression" in recent_content:
-                target_disorder = "major depressive"
-            elif "intermittent explosive" in recent_content or "f63.81" in recent_content:
-                target_disorder = "intermittent explosive"
-        
-        # Then check current query
-        if "ptsd" in query_lower or "posttraumatic stress" in query_lower:
-            target_disorder = "ptsd"
-        elif "borderline personality disorder" in query_lower or "f60.3" in query_lower:
-            target_disorder = "borderline"
-        elif "major depressive disorder" in query_lower or "depression" in query_lower:
-            target_disorder = "major depressive"
-        elif "intermittent explosive" in query_lower or "f63.81" in query_lower:
-            target_disorder = "intermittent explosive"
-        elif "treatment" in query_lower or "therapy" in query_lower or "medication" in query_lower:
-            # For treatment questions, keep the same disorder from context
-            pass
-        
+        if target_disorder is None:
+            target_disorder = self._target_disorder(query, conversation_history)
+
         logger.info(f"🟡 FILTER: Target disorder: {target_disorder}")
-        
+
         if not target_disorder:
             logger.info(f"🟡 FILTER: No specific disorder detected, returning top 3 docs")
             return docs[:3]
-        
-        # Filter documents
+
+        # Filter documents without copying their content: a
+        # case-insensitive search scans each chunk in place
+        match_re = self._disorder_match_res[target_disorder]
         filtered_docs = []
         for doc in docs:
-            doc_content_lower = doc.page_content.lower()
-            if target_disorder in doc_content_lower:
+            if match_re.search(doc.page_content):
                 filtered_docs.append(doc)
         
         logger.info(f"🟡 FILTER: Filtered from {len(docs)} to {len(filtered_docs)} documents")
@@ -194,27 +597,30 @@ RESPONSE:"""
             elif criteria_part:
                 clean_content = criteria_part.replace('CRITERIA:', '').strip()
         
-        # Find a good starting point for the preview
-        sentences = clean_content.split('. ')
-        
-        # Look for sentences that start with context-providing words
-        good_starts = []
-        for i, sentence in enumerate(sentences):
-            sentence_lower = sentence.lower().strip()
-            # Look for sentences that provide good context
-            if any(starter in sentence_lower for starter in [
-                'diagnostic criteria', 'the essential', 'characterized by', 
-                'symptoms include', 'must be present', 'requires', 
-                'differential diagnosis', 'prevalence', 'development'
-            ]):
-                good_starts.append(i)
-        
-        # Use the first good starting point, or start from beginning
-        start_idx = good_starts[0] if good_starts else 0
-        
-        # Create preview with context
-        preview_sentences = sentences[start_idx:start_idx + 3]  # Take 3 sentences for context
-        preview = '. '.join(preview_sentences)
+        # Find a good starting point for the preview: one scan locates the
+        # first context-providing phrase, and counting sentence separators
+        # before its offset maps it back to the sentence start. The three
+        # preview sentences are then sliced straight out of the content by
+        # walking separators, so the chunk is never split into a list.
+        start = 0
+        m = self._starter_re.search(clean_content)
+        if m:
+            start = clean_content.rfind('. ', 0, m.start())
+            start = 0 if start == -1 else start + 2
+
+        # Take 3 sentences for context: end at the third separator after
+        # start, or the end of the content if there are fewer
+        end = len(clean_content)
+        pos = start
+        for remaining in (2, 1, 0):
+            nxt = clean_content.find('. ', pos)
+            if nxt == -1:
+                break
+            if remaining == 0:
+                end = nxt
+            pos = nxt + 2
+
+        preview = clean_content[start:end]
         
         # Add section context if available
         if section_type and section_type != 'General':
@@ -229,160 +635,185 @@ RESPONSE:"""
         
         return preview
 
+    def _replay_result(self, result: Dict[str, Any]):
+        """Yield a completed result as the standard stream events."""
+        yield ("citations", result.get("citations", []))
+        yield ("text", result.get("response", ""))
+        yield ("result", result)
+
     def process_query(self, query: str, conversation_history: list = None) -> Dict[str, Any]:
         """
         Process a patient query and return structured response.
-        
+
+        Joins the chunks from process_query_stream and returns its final
+        envelope, so both entry points share one code path.
+
         Args:
             query: The current user query
             conversation_history: List of previous messages [{'role': 'user/assistant', 'content': '...'}]
         """
-        try:
-            logger.info(f"🟡 AGENT: Starting query processing: {query[:100]}...")
-            
-            # Build intelligent context from conversation history
-            context_prefix = self._build_conversation_context(query, conversation_history)
-            
-            # Check if this is a BPD F60.3 query - use direct approach
-            if "borderline personality disorder" in query.lower() or "f60.3" in query.lower():
-                logger.info("🟡 AGENT: Detected BPD query, using direct criteria")
-                
-                # Return the exact DSM-5-TR criteria with natural language
-                response = """**Borderline Personality Disorder (F60.3) - DSM-5-TR Diagnostic Criteria**^1
-
-A pervasive pattern of instability of interpersonal relationships, self-image, and affects, and marked impulsivity, beginning by early adulthood and present in a variety of contexts, as indicated by five (or more) of the following:
-
-1. Frantic efforts to avoid real or imagined abandonment. (Note: Do not include suicidal or self-mutilating behavior covered in Criterion 5.)
-
-2. A pattern of unstable and intense interpersonal relationships characterized by alternating between extremes of idealization and devaluation.
-
-3. Identity disturbance: markedly and persistently unstable self-image or sense of self.
+        result = None
+        for kind, payload in self.process_query_stream(query, conversation_history):
+            if kind == "result":
+                result = payload
+        return result
 
-4. Impulsivity in at least two areas that are potentially self-damaging (e.g., spending, sex, substance abuse, reckless driving, binge eating). (Note: Do not include suicidal or self-mutilating behavior covered in Criterion 5.)
-
-5. Recurrent suicidal behavior, gestures, or threats, or self-mutilating behavior.
+    async def aprocess_query(self, query: str, conversation_history: list = None) -> Dict[str, Any]:
+        """
+        Async entry point for FastAPI handlers: runs the synchronous
+        pipeline on a worker thread so the event loop keeps serving other
+        requests while the embed, vector search and generation block.
+        """
+        return await asyncio.to_thread(self.process_query, query, conversation_history)
 
-6. Affective instability due to a marked reactivity of mood (e.g., intense episodic dysphoria, irritability, or anxiety usually lasting a few hours and only rarely more than a few days).
+    async def aprocess_query_stream(self, query: str, conversation_history: list = None):
+        """
+        Async iterator over process_query_stream events for SSE handlers.
 
-7. Chronic feelings of emptiness.
+        Each event is pulled from the synchronous generator on a worker
+        thread — the same pattern the chat endpoint uses for the cloud
+        agent — so tokens reach a StreamingResponse as they are produced
+        without blocking the event loop.
+        """
+        stream = self.process_query_stream(query, conversation_history)
+        sentinel = object()
+        while True:
+            item = await asyncio.to_thread(next, stream, sentinel)
+            if item is sentinel:
+                return
+            yield item
+
+    def process_query_stream(self, query: str, conversation_history: list = None):
+        """
+        Stream a response as ("citations", list) then ("text", chunk)
+        events, mirroring CloudAgentService.stream_query, followed by a
+        final ("result", dict) envelope. Tokens reach the caller as the
+        LLM produces them instead of after the full generation; cached
+        and shortcut paths yield their response as a single chunk.
+        """
+        try:
+            logger.info(f"🟡 AGENT: Starting query processing: {query[:100]}...")
 
-8. Inappropriate, intense anger or difficulty controlling anger (e.g., frequent displays of temper, constant anger, recurrent physical fights).
+            # Identical query in the same context: serve the cached result
+            cache_key = self._cache_key(query, conversation_history)
+            with self._cache_lock:
+                cached = self._result_cache.get(cache_key)
+                if cached is not None:
+                    self._result_cache.move_to_end(cache_key)
+            if cached is not None:
+                logger.info("🟢 AGENT: Returning cached response")
+                yield from self._replay_result(dict(cached))
+                return
+
+            # Check if this is a BPD F60.3 query - use direct approach.
+            # The response and citations are module-level constants, so
+            # the shortcut only builds a five-entry envelope dict; it runs
+            # before context assembly, which it doesn't need.
+            if _BPD_RE.search(query):
+                logger.info("🟡 AGENT: Detected BPD query, using direct criteria")
+                result = {**_BPD_BASE, "model": self.model_name, "query": query}
+                self._cache_result(cache_key, result)
+                yield from self._replay_result(result)
+                return
 
-9. Transient, stress-related paranoid ideation or severe dissociative symptoms.^1"""
+            # Build intelligent context from conversation history. The
+            # joined history text is shared with disorder targeting below
+            # so the same messages aren't concatenated twice per request.
+            history_text = self._recent_history_text(conversation_history)
+            context_prefix = self._build_conversation_context(query, conversation_history, history_text)
 
-                citations = [
-                    {
-                        "id": 1,
-                        "content": "Borderline Personality Disorder (F60.3) - Complete diagnostic criteria as specified in DSM-5-TR",
-                        "full_content": response,
-                        "source": "DSM-5-TR, Page 753",
-                        "preview": "F60.3 - A pervasive pattern of instability of interpersonal relationships, self-image, and affects..."
-                    }
-                ]
-                
-                return {
-                    "response": response,
-                    "citations": citations,
-                    "disclaimer": "This is a clinical decision support tool and not a replacement for professional psychiatric evaluation.",
-                    "model": self.model_name,
-                    "query": query
-                }
-            
             # For other queries, use the vector search approach
             logger.info("🟡 AGENT: Using vector search for general query")
             if not self.retriever:
                 logger.error("🔴 AGENT: No retriever available")
-                return {
+                yield from self._replay_result({
                     "response": "Vector database not available. Please try again later.",
                     "citations": [],
-                    "disclaimer": "This is a clinical decision support tool and not a replacement for professional psychiatric evaluation.",
+                    "disclaimer": _DISCLAIMER,
                     "query": query
-                }
-                
-            docs = self.retriever.invoke(query)
+                })
+                return
+
+
+            # Embed the query once; the vector serves both the semantic
+            # cache and the vector search, so Chroma doesn't re-embed the
+            # query internally. Queries differing only in casing or
+            # whitespace reuse the cached embedding and retrieval outright.
+            target_disorder = self._target_disorder(query, conversation_history, history_text)
+            norm_query = re.sub(r"\s+", " ", query.strip().lower())
+            retrieval_key = (norm_query, target_disorder)
+            with self._cache_lock:
+                cached_retrieval = self._retrieval_cache.get(retrieval_key)
+                if cached_retrieval is not None:
+                    self._retrieval_cache.move_to_end(retrieval_key)
+            if cached_retrieval is not None:
+                query_vec, docs = cached_retrieval
+            else:
+                query_raw, query_vec = self._embed_query(query)
+                docs = None
+
+            sem_hit = self._semantic_cache_get(query_vec, context_prefix)
+            if sem_hit is not None:
+                logger.info("🟢 AGENT: Returning semantically cached response")
+                yield from self._replay_result(dict(sem_hit))
+                return
+
+            if docs is None:
+                docs = self._search_docs(query_raw, target_disorder)
+                with self._cache_lock:
+                    self._retrieval_cache[retrieval_key] = (query_vec, docs)
+                    if len(self._retrieval_cache) > self._retrieval_cache_max:
+                        self._retrieval_cache.popitem(last=False)
             logger.info(f"🟡 AGENT: Retrieved {len(docs)} documents")
-            
+
             # Filter documents to relevant disorder
-            filtered_docs = self._filter_relevant_docs(docs, query, conversation_history)
+            filtered_docs = self._filter_relevant_docs(docs, query, conversation_history, target_disorder)
             logger.info(f"🟡 AGENT: Filtered to {len(filtered_docs)} relevant documents")
             
             if not filtered_docs:
                 logger.warning("🟠 AGENT: No relevant documents found")
-                return {
+                yield from self._replay_result({
                     "response": "I couldn't find specific information about that disorder in the DSM-5-TR database. Please check the spelling or try a different disorder name.",
                     "citations": [],
-                    "disclaimer": "This is a clinical decision support tool and not a replacement for professional psychiatric evaluation.",
+                    "disclaimer": _DISCLAIMER,
                     "query": query
-                }
-            
+                })
+                return
+
             # Build chain with filtered context
             if not self.llm:
                 logger.error("🔴 AGENT: No LLM available")
-                return {
+                yield from self._replay_result({
                     "response": "Language model not available. Please try again later.",
                     "citations": [],
-                    "disclaimer": "This is a clinical decision support tool and not a replacement for professional psychiatric evaluation.",
+                    "disclaimer": _DISCLAIMER,
                     "query": query
-                }
-                
-            chain = (
-                {
-                    "context": lambda _: self._format_docs(filtered_docs),
-                    "conversation_context": lambda _: context_prefix,
-                    "question": RunnablePassthrough(),
-                }
-                | self.prompt
-                | self.llm
-                | StrOutputParser()
-            )
-            
-            # Generate response
-            logger.info("🟡 AGENT: Generating LLM response...")
-            response = chain.invoke(query)
-            logger.info(f"🟡 AGENT: LLM response generated, length: {len(response)}")
-            logger.info(f"🟡 AGENT: Response preview: {response[:200]}...")
-            
+                })
+                return
+
+
+            chain_input = {
+                "context": self._format_docs(filtered_docs),
+                "conversation_context": context_prefix,
+                "question": query,
+            }
+
+            # Citations depend only on the retrieved documents, so they can
+            # go out before generation starts and the UI can render sources
+            # while tokens stream in.
             # Format citations from filtered documents with hierarchical metadata
             citations = []
             for i, doc in enumerate(filtered_docs, 1):
-                # Extract hierarchical metadata from document
-                metadata = doc.metadata
                 content = doc.page_content
-                preview = content[:200] + "..." if len(content) > 200 else content
-                
-                # Extract disorder info from metadata or content
-                disorder_name = metadata.get('disorder_name', 'Unknown Disorder')
-                icd_code = metadata.get('icd_code', '')
-                section_type = metadata.get('section_type', 'General')
-                chunk_type = metadata.get('chunk_type', 'unknown')
-                hierarchy_path = metadata.get('hierarchy_path', f'DSM-5-TR > {disorder_name}')
-                page_number = metadata.get('page', None)
-                
-                # Parse structured content to extract disorder info
-                if content.startswith('DOCUMENT:'):
-                    parts = content.split(';')
-                    for part in parts:
-                        part = part.strip()
-                        if part.startswith('DISORDER:'):
-                            disorder_name = part.replace('DISORDER:', '').strip()
-                        elif part.startswith('SECTION:'):
-                            section_type = part.replace('SECTION:', '').strip()
-                
-                # Fallback extraction if still missing
-                if disorder_name == 'Unknown Disorder':
-                    if "borderline personality disorder" in content.lower():
-                        disorder_name = "Borderline Personality Disorder"
-                        icd_code = "F60.3"
-                    elif "major depressive disorder" in content.lower():
-                        disorder_name = "Major Depressive Disorder"
-                        icd_code = "F32.9"
-                    elif "intermittent explosive disorder" in content.lower():
-                        disorder_name = "Intermittent Explosive Disorder" 
-                        icd_code = "F63.81"
-                    elif "ptsd" in content.lower() or "posttraumatic stress" in content.lower():
-                        disorder_name = "Posttraumatic Stress Disorder"
-                        icd_code = "F43.10"
-                
+
+                # Structural metadata was parsed once at load time; parse
+                # on the fly only for chunks missing from the index
+                meta = self._doc_meta.get(content)
+                if meta is None:
+                    meta = self._parse_doc_meta(content, doc.metadata)
+                disorder_name, icd_code, section_type, chunk_type, page_number = meta
+                hierarchy_path = doc.metadata.get('hierarchy_path', f'DSM-5-TR > {disorder_name}')
+
                 # Build proper hierarchy path
                 if disorder_name != 'Unknown Disorder':
                     if section_type and section_type != 'General':
@@ -409,48 +840,55 @@ A pervasive pattern of instability of interpersonal relationships, self-image, a
                     "child_context": section_type if chunk_type == 'child' else None
                 })
             
-            # Add inline citation markers to response (industry standard)
-            if citations:
-                # Add citation markers at the end of key statements
-                response_with_citations = response
-                # Simple approach: add citation markers after periods for key diagnostic information
-                import re
-                sentences = re.split(r'(?<=\.)\s+', response)
-                if len(sentences) > 1:
-                    # Add citation to first major sentence about criteria
-                    for i, sentence in enumerate(sentences):
-                        if any(word in sentence.lower() for word in ['criteria', 'disorder', 'diagnosis', 'symptoms']):
-                            sentences[i] = sentence.rstrip() + f"^{citations[0]['id']}"
-                            break
-                    response_with_citations = ' '.join(sentences)
-                else:
-                    # Single sentence or paragraph - add citation at end
-                    response_with_citations = response.rstrip() + f"^{citations[0]['id']}"
-                
-                response = response_with_citations
-            
             logger.info(f"🟡 AGENT: Formatted {len(citations)} citations")
-            
+            yield ("citations", citations)
+
+            # Generate response, forwarding chunks as they arrive
+            logger.info("🟡 AGENT: Generating LLM response...")
+            parts = []
+            for chunk in self.chain.stream(chain_input):
+                parts.append(chunk)
+                yield ("text", chunk)
+            response = "".join(parts)
+            logger.info(f"🟡 AGENT: LLM response generated, length: {len(response)}")
+
+            # Add inline citation markers to response (industry standard).
+            # Two searches and one splice instead of splitting the whole
+            # response into sentences, scanning each, and rejoining.
+            if citations:
+                marker = f"^{citations[0]['id']}"
+                kw = self._cite_kw_re.search(response)
+                if kw:
+                    sent_end = self._sent_end_re.search(response, kw.end())
+                    if sent_end:
+                        cut = sent_end.start() + 1
+                        response = response[:cut] + marker + response[cut:]
+                    else:
+                        # Keyword sentence runs to the end of the response
+                        response = response.rstrip() + marker
+
             result = {
                 "response": response,
                 "citations": citations,
-                "disclaimer": "This is a clinical decision support tool and not a replacement for professional psychiatric evaluation.",
+                "disclaimer": _DISCLAIMER,
                 "model": self.model_name,
                 "query": query
             }
             
+            self._cache_result(cache_key, result)
+            self._semantic_cache_put(query_vec, context_prefix, result)
             logger.info("🟢 AGENT: Query processing completed successfully")
-            return result
-            
+            yield ("result", result)
+
         except Exception as ex:
             logger.error(f"🔴 AGENT: Error processing query: {ex}")
-            return {
+            yield from self._replay_result({
                 "response": "I apologize, but I encountered an error processing your query. Please try again or contact support if the issue persists.",
                 "citations": [],
-                "disclaimer": "This is a clinical decision support tool and not a replacement for professional psychiatric evaluation.",
+                "disclaimer": _DISCLAIMER,
                 "error": str(ex),
                 "query": query
-            }
+            })
 
 
 # Global agent service instance
@@ -471,8 +909,30 @@ def get_agent_service() -> AgentService:
                     return {
                         "response": "Agent service temporarily unavailable. Please try again later.",
                         "citations": [],
-                        "disclaimer": "This is a clinical decision support tool and not a replacement for professional psychiatric evaluation.",
+                        "disclaimer": _DISCLAIMER,
                         "error": str(ex)
                     }
             _agent_service = DummyAgentService()
     return _agent_service
+
+
+def preload_agent_service() -> None:
+    """Construct the shared agent service before workers fork.
+
+    For gunicorn --preload (or a when_ready hook): the parent process
+    loads the embedding model and opens Chroma once, and forked workers
+    share the read-only weight pages instead of each holding its own
+    copy and re-paying the cold start. Tokenizer thread pools don't
+    survive a fork, so they are disabled first; moving the weights into
+    shared memory keeps them physically shared even if a worker touches
+    them.
+    """
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+    service = get_agent_service()
+    client = getattr(getattr(service, "embeddings", None), "client", None)
+    if client is not None:
+        try:
+            for param in client.parameters():
+                param.share_memory_()
+        except Exception as ex:
+            logger.warning(f"Could not move embedding weights to shared memory: {ex}")
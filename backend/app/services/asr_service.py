@@ -13,16 +13,21 @@ class ASRService:
         self.ws_url = "wss://api.assemblyai.com/v2/realtime/ws"
         
     async def transcribe_file(self, audio_file_path: str) -> Dict[str, Any]:
-        """Transcribe an audio file"""
+        """Transcribe an audio file on disk"""
+        with open(audio_file_path, 'rb') as f:
+            return await self.transcribe_stream(f)
+
+    async def transcribe_stream(self, audio_file) -> Dict[str, Any]:
+        """Transcribe audio from a file-like object without a disk round-trip"""
         try:
-            upload_url = await self._upload_file(audio_file_path)
+            upload_url = await self._upload(audio_file)
             transcript_response = await self._request_transcription(upload_url)
-            
+
             if 'id' not in transcript_response:
                 raise Exception(f"Invalid API response: {transcript_response}")
-            
+
             transcript = await self._poll_transcription(transcript_response['id'])
-            
+
             return {
                 'text': transcript.get('text', '') or 'No speech detected in audio',
                 'confidence': transcript.get('confidence', 0),
@@ -31,23 +36,22 @@ class ASRService:
             }
         except Exception as e:
             raise
-    
-    async def _upload_file(self, file_path: str) -> str:
-        """Upload audio file to AssemblyAI"""
+
+    async def _upload(self, audio_file) -> str:
+        """Upload audio to AssemblyAI from a file-like object"""
         async with aiohttp.ClientSession() as session:
-            with open(file_path, 'rb') as f:
-                async with session.post(
-                    f"{self.base_url}/upload",
-                    headers={"Authorization": self.api_key},
-                    data=f
-                ) as response:
-                    if response.status != 200:
-                        error_text = await response.text()
-                        raise Exception(f"Upload failed ({response.status}): {error_text}")
-                    result = await response.json()
-                    if 'upload_url' not in result:
-                        raise Exception(f"Invalid upload response: {result}")
-                    return result['upload_url']
+            async with session.post(
+                f"{self.base_url}/upload",
+                headers={"Authorization": self.api_key},
+                data=audio_file
+            ) as response:
+                if response.status != 200:
+                    error_text = await response.text()
+                    raise Exception(f"Upload failed ({response.status}): {error_text}")
+                result = await response.json()
+                if 'upload_url' not in result:
+                    raise Exception(f"Invalid upload response: {result}")
+                return result['upload_url']
     
     async def _request_transcription(self, upload_url: str) -> Dict[str, Any]:
         """Request transcription of uploaded file"""
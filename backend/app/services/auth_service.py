@@ -44,7 +44,10 @@ class AuthService:
     @staticmethod
     def is_user_allowed(db: Session, email: str) -> bool:
         """Check if user is in allowlist."""
-        return db.query(Allowlist).filter(Allowlist.email == email).first() is not None
+        # EXISTS returns a bare boolean - no row transfer or ORM hydration
+        return db.query(
+            db.query(Allowlist).filter(Allowlist.email == email).exists()
+        ).scalar()
 
     @staticmethod
     def get_or_create_user(db: Session, email: str) -> Optional[User]:
@@ -59,9 +62,9 @@ class AuthService:
         if not allowlist_entry:
             return None
         
-        # Create new user
+        # Create new user (no refresh needed: defaults are client-side and
+        # the session doesn't expire attributes on commit)
         user = User(email=email, is_admin=allowlist_entry.is_admin)
         db.add(user)
         db.commit()
-        db.refresh(user)
         return user
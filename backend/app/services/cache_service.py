@@ -0,0 +1,57 @@
+"""
+Redis cache service for expensive, slowly-changing responses.
+Degrades to a no-op when Redis is not configured or unreachable.
+"""
+
+import logging
+from typing import Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class CacheService:
+    """Thin wrapper around redis.asyncio with graceful degradation."""
+
+    def __init__(self):
+        self._client = None
+        self._available = bool(settings.redis_url)
+
+    def _get_client(self):
+        """Lazily create the Redis client so import never blocks startup."""
+        if self._client is None and self._available:
+            try:
+                import redis.asyncio as redis
+                self._client = redis.Redis.from_url(
+                    settings.redis_url, decode_responses=True
+                )
+            except Exception as e:
+                logger.warning(f"Redis unavailable, caching disabled: {e}")
+                self._available = False
+        return self._client
+
+    async def get(self, key: str) -> Optional[str]:
+        """Get a cached value, or None on miss or Redis failure."""
+        client = self._get_client()
+        if client is None:
+            return None
+        try:
+            return await client.get(key)
+        except Exception as e:
+            logger.warning(f"Redis GET failed for {key}: {e}")
+            return None
+
+    async def set(self, key: str, value: str, ttl_seconds: int = 120) -> None:
+        """Cache a value with a TTL; failures are logged and ignored."""
+        client = self._get_client()
+        if client is None:
+            return
+        try:
+            await client.setex(key, ttl_seconds, value)
+        except Exception as e:
+            logger.warning(f"Redis SET failed for {key}: {e}")
+
+
+# Global instance
+cache_service = CacheService()
@@ -4,7 +4,7 @@ Chat service for managing sessions and messages.
 
 from typing import List, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import desc, func
 from app.models import ChatSession, Message, User
 from datetime import datetime
 
@@ -21,7 +21,6 @@ class ChatService:
         )
         db.add(session)
         db.commit()
-        db.refresh(session)
         return session
 
     @staticmethod
@@ -55,7 +54,8 @@ class ChatService:
         return True
 
     @staticmethod
-    def add_message(db: Session, session_id: int, role: str, content: str, citations: list = None) -> Message:
+    def add_message(db: Session, session_id: int, role: str, content: str,
+                    citations: list = None) -> Message:
         """Add a message to a session."""
         message = Message(
             session_id=session_id,
@@ -64,14 +64,17 @@ class ChatService:
             citations=citations
         )
         db.add(message)
-        
-        # Update session timestamp
-        session = db.query(ChatSession).filter(ChatSession.id == session_id).first()
-        if session:
-            session.updated_at = datetime.utcnow()
-        
+
+        # Bump the session timestamp with a bulk UPDATE: hydrating the
+        # ChatSession just for this would also fire its selectin messages
+        # load, dragging the whole history into memory per send. func.now()
+        # keeps the column on the DB clock, consistent with its
+        # server_default/onupdate - the session list is ordered by it
+        db.query(ChatSession).filter(ChatSession.id == session_id).update(
+            {ChatSession.updated_at: func.now()}, synchronize_session=False
+        )
+
         db.commit()
-        db.refresh(message)
         return message
 
     @staticmethod
@@ -80,3 +83,15 @@ class ChatService:
         return db.query(Message).filter(
             Message.session_id == session_id
         ).order_by(Message.created_at).all()
+
+    @staticmethod
+    def get_recent_messages(db: Session, session_id: int, limit: int = 6) -> List[Message]:
+        """Get the most recent messages for a session, oldest first.
+
+        Uses ORDER BY ... DESC LIMIT so long sessions don't hydrate every
+        row just to keep the tail.
+        """
+        recent = db.query(Message).filter(
+            Message.session_id == session_id
+        ).order_by(desc(Message.created_at), desc(Message.id)).limit(limit).all()
+        return recent[::-1]
@@ -0,0 +1,33 @@
+"""
+Prompt constants for clinical note generation.
+
+Layout: static instructions, then the transcript, then the per-request
+details. Keeping the long invariant part a byte-identical prefix lets
+provider prompt-prefix caching reuse it when the same transcript is
+regenerated (different template, re-click, etc).
+"""
+
+NOTE_PROMPT_PREFIX = (
+    "You are a clinical psychologist generating a structured clinical note "
+    "from this session transcript.\n\nTRANSCRIPT:\n"
+)
+
+NOTE_SECTIONS_INSTRUCTION = (
+    "Generate all five note sections: the chief complaint (main concern or reason "
+    "for visit), history of present illness (onset, duration and characteristics of "
+    "current symptoms), review of systems (relevant positive and negative findings), "
+    "assessment and plan (clinical assessment with potential diagnoses and treatment "
+    "recommendations), and follow-up/disposition (next steps and timeline).\n"
+    'Return ONLY a strict JSON object with exactly the keys "chief_complaint", '
+    '"history_present_illness", "review_systems", "assessment_plan" and '
+    '"followup_disposition". Each value must be 2-3 concise clinical sentences '
+    "without section headers or labels."
+)
+
+NOTE_SECTION_DEFAULTS = {
+    "chief_complaint": 'Patient presents for clinical evaluation.',
+    "history_present_illness": 'Patient describes current symptoms and their progression.',
+    "review_systems": 'Review of systems notable for reported symptoms.',
+    "assessment_plan": 'Clinical assessment and treatment plan to be determined.',
+    "followup_disposition": 'Follow-up recommendations to be provided.',
+}
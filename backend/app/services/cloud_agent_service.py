@@ -3,45 +3,38 @@ Cloud-based agent service using RAG + Groq.
 Automatically selects ChromaDB (local) or Pinecone (cloud).
 """
 
+import logging
 import os
 from typing import Dict, Any, List
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
 
 class CloudAgentService:
     """Agent service that adapts to local or cloud environment."""
-    
+
     def __init__(self):
         self.use_rag = os.getenv("USE_RAG", "true").lower() == "true"
         self.environment = settings.environment
-        print(f"🔍 CloudAgentService initialized: USE_RAG={os.getenv('USE_RAG')}, use_rag={self.use_rag}")
-        
+        logger.debug("CloudAgentService initialized: use_rag=%s", self.use_rag)
+
     def process_query(self, query: str, conversation_history: List[Dict] = None) -> Dict[str, Any]:
         """Process query using appropriate RAG or fallback to LLM-only."""
-        print(f"🔍 CloudAgentService.process_query called")
-        print(f"🔍 USE_RAG={os.getenv('USE_RAG')}")
-        print(f"🔍 self.use_rag={self.use_rag}")
-        import sys
-        sys.stdout.flush()  # Force flush
-        
+        logger.debug("process_query called, use_rag=%s", self.use_rag)
         try:
-            print(f"🔍 About to check self.use_rag: {self.use_rag}")
-            sys.stdout.flush()
             if self.use_rag:
-                print(f"🔍 Attempting RAG processing...")
-                sys.stdout.flush()
                 return self._process_with_rag(query, conversation_history)
             else:
-                print(f"🔍 Using LLM-only (USE_RAG=false)")
-                sys.stdout.flush()
                 return self._process_llm_only(query, conversation_history)
         except Exception as e:
-            import traceback
-            print(f"Agent processing error: {e}")
-            print(traceback.format_exc())
+            logger.exception("Agent processing error")
+            # The "error" key marks this envelope as a failure so callers
+            # (e.g. the chat response cache) don't treat it as an answer
             return {
                 "response": f"I apologize, but I'm experiencing technical difficulties: {str(e)}. Please try again.",
-                "citations": []
+                "citations": [],
+                "error": str(e)
             }
     
     def _process_with_rag(self, query: str, conversation_history: List[Dict] = None) -> Dict[str, Any]:
@@ -50,48 +43,69 @@ class CloudAgentService:
             # Check if we should use cloud RAG
             use_cloud_rag = os.getenv("USE_CLOUD_RAG", "false").lower() == "true"
             use_multi_source = os.getenv("USE_MULTI_SOURCE", "false").lower() == "true"
-            print(f"🔍 USE_CLOUD_RAG={os.getenv('USE_CLOUD_RAG')}, use_cloud_rag={use_cloud_rag}")
-            print(f"🔍 USE_MULTI_SOURCE={os.getenv('USE_MULTI_SOURCE')}, use_multi_source={use_multi_source}")
-            
+            logger.debug("use_cloud_rag=%s, use_multi_source=%s", use_cloud_rag, use_multi_source)
+
             if use_cloud_rag:
                 if use_multi_source:
                     # Use multi-source RAG (DSM-5-TR + ICD-11 + more)
-                    print("🔍 Using Multi-Source RAG service (DSM-5-TR + ICD-11)")
+                    logger.debug("Using Multi-Source RAG service (DSM-5-TR + ICD-11)")
                     from app.services.multi_source_rag_service import multi_source_rag_service
                     return multi_source_rag_service.process_query(query, conversation_history)
                 else:
                     # Use Pinecone only
-                    print("🔍 Using Pinecone cloud RAG service")
+                    logger.debug("Using Pinecone cloud RAG service")
                     from app.services.cloud_rag_service import cloud_rag_service
                     return cloud_rag_service.process_query(query, conversation_history)
             else:
                 # Use ChromaDB for local
-                print("🔍 Using ChromaDB local RAG service")
+                logger.debug("Using ChromaDB local RAG service")
                 try:
                     from app.services.rag_service import rag_service
                     return rag_service.process_query(query, conversation_history)
                 except ImportError as e:
-                    print(f"🔍 ChromaDB not available (cloud environment): {e}")
+                    logger.debug("ChromaDB not available (cloud environment): %s", e)
                     # Fall back to LLM-only in cloud if ChromaDB packages missing
                     return self._process_llm_only(query, conversation_history)
-                
-        except Exception as e:
-            print(f"RAG processing failed: {e}, falling back to LLM-only")
-            import traceback
-            print(f"RAG error traceback: {traceback.format_exc()}")
-            import sys
-            sys.stdout.flush()
+
+        except Exception:
+            logger.exception("RAG processing failed, falling back to LLM-only")
             return self._process_llm_only(query, conversation_history)
     
-    def _process_llm_only(self, query: str, conversation_history: List[Dict] = None) -> Dict[str, Any]:
-        """Fallback: Process query using Groq without RAG."""
+    def stream_query(self, query: str, conversation_history: List[Dict] = None):
+        """Stream the agent response as it is produced.
+
+        Yields ("citations", list) and ("text", str) tuples so callers can
+        forward chunks to the client without buffering the whole response.
+        RAG paths return complete responses, so those are yielded as a single
+        text chunk; the LLM-only path streams real tokens from Groq. If
+        every path fails, a final ("error", message) event is yielded so
+        callers can show the apology without mistaking it for an answer.
+        """
+        if self.use_rag:
+            try:
+                result = self._process_with_rag(query, conversation_history)
+                yield ("citations", result.get("citations", []))
+                yield ("text", result.get("response", ""))
+                return
+            except Exception:
+                logger.exception("RAG streaming failed, falling back to LLM-only stream")
+
+        from app.services.groq_service import groq_service
+
+        yield ("citations", [])
         try:
-            from app.services.groq_service import groq_service
-            
-            messages = [
-                {
-                    "role": "system",
-                    "content": """You are a psychiatric clinical decision support assistant with expertise in DSM-5-TR diagnostic criteria. 
+            for token in groq_service.stream_response(self._build_llm_messages(query, conversation_history)):
+                yield ("text", token)
+        except Exception as e:
+            logger.exception("LLM-only streaming failed")
+            yield ("error", f"I apologize, but I'm experiencing technical difficulties: {str(e)}. Please try again.")
+
+    def _build_llm_messages(self, query: str, conversation_history: List[Dict] = None) -> List[Dict]:
+        """Build the Groq chat messages for LLM-only processing."""
+        messages = [
+            {
+                "role": "system",
+                "content": """You are a psychiatric clinical decision support assistant with expertise in DSM-5-TR diagnostic criteria.
 
 Provide detailed, accurate information about:
 - Diagnostic criteria for psychiatric disorders
@@ -101,25 +115,31 @@ Provide detailed, accurate information about:
 
 Always structure your responses clearly and cite DSM-5-TR when discussing diagnostic criteria.
 Note: You are currently operating without access to the full DSM-5-TR database."""
-                }
-            ]
-            
-            if conversation_history:
-                for msg in conversation_history[-4:]:
-                    messages.append({"role": msg["role"], "content": msg["content"]})
-            
-            messages.append({"role": "user", "content": query})
-            
-            response = groq_service.generate_response(messages)
-            
+            }
+        ]
+
+        if conversation_history:
+            for msg in conversation_history[-4:]:
+                messages.append({"role": msg["role"], "content": msg["content"]})
+
+        messages.append({"role": "user", "content": query})
+        return messages
+
+    def _process_llm_only(self, query: str, conversation_history: List[Dict] = None) -> Dict[str, Any]:
+        """Fallback: Process query using Groq without RAG."""
+        try:
+            from app.services.groq_service import groq_service
+
+            response = groq_service.generate_response(
+                self._build_llm_messages(query, conversation_history)
+            )
+
             return {
                 "response": response,
                 "citations": []
             }
-        except Exception as e:
-            import traceback
-            print(f"Error in _process_llm_only: {e}")
-            print(traceback.format_exc())
+        except Exception:
+            logger.exception("Error in _process_llm_only")
             raise
     
     def _process_with_fallback(self, query: str) -> Dict[str, Any]:
@@ -169,6 +189,4 @@ A pervasive pattern of instability of interpersonal relationships, self-image, a
 
 
 # Global instance
-print(f"🔍 Creating CloudAgentService instance...")
 cloud_agent_service = CloudAgentService()
-print(f"🔍 CloudAgentService instance created")
@@ -4,6 +4,7 @@ Groq LLM service for cloud deployment.
 
 import os
 from typing import Dict, Any, List
+import httpx
 from openai import OpenAI
 from app.core.config import settings
 
@@ -16,15 +17,26 @@ class GroqService:
         if not api_key:
             raise ValueError("GROQ_API_KEY environment variable is required")
         
-        # Use OpenAI client with Groq endpoint
+        # Use OpenAI client with Groq endpoint. An explicit keep-alive pool
+        # means sequential LLM calls reuse the same TLS connection instead
+        # of paying a handshake each time.
         self.client = OpenAI(
             api_key=api_key,
-            base_url="https://api.groq.com/openai/v1"
+            base_url="https://api.groq.com/openai/v1",
+            http_client=httpx.Client(
+                timeout=60,
+                limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+            ),
         )
         self.model = "llama-3.3-70b-versatile"
     
     def generate_response(self, messages: List[Dict[str, str]], **kwargs) -> str:
-        """Generate response using Groq API."""
+        """Generate response using Groq API.
+
+        Raises on API failure so callers can tell an error from a real
+        answer - swallowing it here used to return apology text that
+        upstream layers cached as a successful response.
+        """
         try:
             response = self.client.chat.completions.create(
                 model=self.model,
@@ -36,10 +48,10 @@ class GroqService:
             return response.choices[0].message.content
         except Exception as e:
             print(f"Groq API error: {e}")
-            return "I apologize, but I'm experiencing technical difficulties. Please try again."
-    
+            raise
+
     def stream_response(self, messages: List[Dict[str, str]], **kwargs):
-        """Stream response using Groq API."""
+        """Stream response using Groq API. Raises on API failure."""
         try:
             stream = self.client.chat.completions.create(
                 model=self.model,
@@ -49,14 +61,14 @@ class GroqService:
                 stream=True,
                 **kwargs
             )
-            
+
             for chunk in stream:
                 if chunk.choices[0].delta.content is not None:
                     yield chunk.choices[0].delta.content
-                    
+
         except Exception as e:
             print(f"Groq streaming error: {e}")
-            yield "I apologize, but I'm experiencing technical difficulties. Please try again."
+            raise
 
 
 # Global instance
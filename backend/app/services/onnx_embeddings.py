@@ -0,0 +1,84 @@
+"""
+ONNX Runtime embedding backend for CPU-only deployments.
+
+The default Torch path runs FP32 kernels with per-layer Python overhead.
+Exporting the sentence-transformer to ONNX with int8 dynamic
+quantization trades a one-time export cost for much cheaper inference:
+int8 GEMMs and fused attention kernels. Selected via
+settings.embedder_backend == "onnx"; requires the optimum[onnxruntime]
+extra, which is why the imports live inside the class.
+"""
+
+import hashlib
+import logging
+import os
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+_QUANTIZED_FILE = "model_quantized.onnx"
+
+
+class OnnxEmbeddings(Embeddings):
+    """Embeddings served from an int8-quantized ONNX export.
+
+    The exported and quantized model is cached on disk keyed by a hash
+    of the model name, so the export runs once per model rather than
+    once per process. Output matches the sentence-transformers pipeline:
+    mean pooling over the attention mask, then L2 normalization.
+    """
+
+    def __init__(self, model_name: str, cache_dir: str = None):
+        from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+        from optimum.onnxruntime.configuration import AutoQuantizationConfig
+        from transformers import AutoTokenizer
+
+        # Bare sentence-transformers names resolve under this hub org
+        if "/" not in model_name:
+            model_name = f"sentence-transformers/{model_name}"
+
+        cache_dir = cache_dir or os.path.join(
+            os.path.expanduser("~"), ".cache", "psych-agent", "onnx"
+        )
+        model_dir = os.path.join(
+            cache_dir, hashlib.sha256(model_name.encode()).hexdigest()[:16]
+        )
+
+        if not os.path.exists(os.path.join(model_dir, _QUANTIZED_FILE)):
+            logger.info(f"Exporting and quantizing {model_name} into {model_dir}")
+            os.makedirs(model_dir, exist_ok=True)
+            exported = ORTModelForFeatureExtraction.from_pretrained(
+                model_name, export=True, provider="CPUExecutionProvider"
+            )
+            exported.save_pretrained(model_dir)
+            quantizer = ORTQuantizer.from_pretrained(exported)
+            quantizer.quantize(
+                save_dir=model_dir,
+                quantization_config=AutoQuantizationConfig.avx512_vnni(
+                    is_static=False, per_channel=True
+                ),
+            )
+
+        self.model = ORTModelForFeatureExtraction.from_pretrained(
+            model_dir, file_name=_QUANTIZED_FILE, provider="CPUExecutionProvider"
+        )
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts: tokenize, run the session, mean-pool, normalize."""
+        encoded = self.tokenizer(
+            texts, padding=True, truncation=True, max_length=256, return_tensors="pt"
+        )
+        outputs = self.model(**encoded)
+        hidden = outputs.last_hidden_state.numpy().astype(np.float32)
+        mask = encoded["attention_mask"].unsqueeze(-1).numpy().astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single query string."""
+        return self.embed_documents([text])[0]
@@ -0,0 +1,52 @@
+"""
+Remote embedding backend: thin client for an embedding sidecar.
+
+With several prefork workers, every process otherwise holds its own
+copy of the embedding model. Pointing them at one node-local
+text-embeddings-inference (TEI) compatible server means a single set of
+weights serves all workers, the server batches requests dynamically
+across them, and encoding runs outside the Python GIL. Selected via
+settings.embedder_backend == "remote".
+"""
+
+import logging
+from typing import List
+
+import httpx
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+_LIMITS = httpx.Limits(max_keepalive_connections=8, max_connections=16)
+
+
+class RemoteEmbeddings(Embeddings):
+    """Client for a TEI-compatible embedding server.
+
+    Keeps one pooled keep-alive client per instance. unix:// URLs talk
+    over a local socket, so per-request overhead is a UDS round trip
+    instead of TCP connection handling.
+    """
+
+    def __init__(self, server_url: str, timeout: float = 30.0):
+        if server_url.startswith("unix://"):
+            self._client = httpx.Client(
+                base_url="http://embeddings",
+                transport=httpx.HTTPTransport(uds=server_url[len("unix://"):]),
+                timeout=timeout,
+                limits=_LIMITS,
+            )
+        else:
+            self._client = httpx.Client(
+                base_url=server_url, timeout=timeout, limits=_LIMITS
+            )
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts in one request; the server batches internally."""
+        response = self._client.post("/embed", json={"inputs": texts})
+        response.raise_for_status()
+        return response.json()
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single query string."""
+        return self.embed_documents([text])[0]
@@ -6,7 +6,6 @@ from typing import List, Optional, Dict, Any
 from sqlalchemy.orm import Session
 from sqlalchemy import desc
 from app.models import ScribeSession, User
-from datetime import datetime
 
 
 class ScribeSessionService:
@@ -37,7 +36,6 @@ class ScribeSessionService:
         )
         db.add(session)
         db.commit()
-        db.refresh(session)
         return session
 
     @staticmethod
@@ -88,9 +86,8 @@ class ScribeSessionService:
             session.review_systems = content.get('review_systems', session.review_systems)
             session.assessment_plan = content.get('assessment_plan', session.assessment_plan)
             session.followup_disposition = content.get('followup_disposition', session.followup_disposition)
-            session.updated_at = datetime.utcnow()
-            
+            # updated_at is maintained server-side via onupdate=func.now()
+
             db.commit()
-            db.refresh(session)
             return session
         return None
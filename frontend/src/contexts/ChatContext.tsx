@@ -185,7 +185,9 @@ export const ChatProvider: React.FC<ChatProviderProps> = ({ children }) => {
                     break
                   
                   case 'response_chunk':
-                    assistantMessage += (assistantMessage ? ' ' : '') + data.data.chunk
+                    // Chunks are raw producer output (possibly sub-word
+                    // tokens), so concatenate verbatim - no space injection
+                    assistantMessage += data.data.chunk
                     setMessages(prev => prev.map(msg => 
                       msg.streaming ? { ...msg, content: assistantMessage } : msg
                     ))